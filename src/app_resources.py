@@ -0,0 +1,23 @@
+import time
+import streamlit as st
+from services import metrics
+from services.interview_orchestrator import InterviewOrchestrator
+
+
+@st.cache_resource(show_spinner=False)
+def get_orchestrator():
+    """
+    One orchestrator per server process, shared by every session and rerun, so its database
+    pool, Redis clients and (once used) OpenAI clients stay warm between reruns.
+    """
+    return InterviewOrchestrator()
+
+
+def record_first_render(page, started):
+    """
+    Records how long this session's first render of `page` took, as the first_render_<page> stage.
+    """
+    key = f"first_render_recorded_{page}"
+    if not st.session_state.get(key):
+        st.session_state[key] = True
+        metrics.record_timing(f"first_render_{page}", time.perf_counter() - started, get_orchestrator().db)
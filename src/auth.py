@@ -1,41 +1,73 @@
 import streamlit as st
 import os
+import uuid
 import redis
-import time
+from redis_client import get_redis
+
+# One round trip per attempt: checks both locks, then either clears the client's failures
+# (success) or records the failure in both sliding windows and locks whichever is exceeded.
+# KEYS: client+username window, client window, client+username lock, client lock
+# ARGV: success (1/0), window ms, max per client+username, max per client, lock seconds, unique member
+LOGIN_SCRIPT = """
+for _, lock in ipairs({KEYS[3], KEYS[4]}) do
+    local ttl = redis.call('TTL', lock)
+    if ttl > 0 then
+        return {'locked', ttl}
+    end
+end
+
+if ARGV[1] == '1' then
+    redis.call('DEL', KEYS[1])
+    return {'ok', 0}
+end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window, lock_seconds = tonumber(ARGV[2]), tonumber(ARGV[5])
+local remaining = nil
+local locked = false
+local windows = {{KEYS[1], KEYS[3], tonumber(ARGV[3])}, {KEYS[2], KEYS[4], tonumber(ARGV[4])}}
+for _, w in ipairs(windows) do
+    redis.call('ZREMRANGEBYSCORE', w[1], '-inf', now - window)
+    redis.call('ZADD', w[1], now, ARGV[6])
+    redis.call('PEXPIRE', w[1], window)
+    local count = redis.call('ZCARD', w[1])
+    if count >= w[3] then
+        redis.call('SET', w[2], 1, 'EX', lock_seconds)
+        redis.call('DEL', w[1])
+        locked = true
+    elseif remaining == nil or w[3] - count < remaining then
+        remaining = w[3] - count
+    end
+end
+
+if locked then
+    return {'locked_now', lock_seconds}
+end
+return {'failed', remaining}
+"""
+
 
 class AuthService:
+    """
+    Credential check plus a login limiter keyed per client (IP) and per client+username,
+    so a failed-login storm from one client doesn't lock anyone else out.
+    """
+
     def __init__(self):
         self.redis_host = os.environ.get("REDIS_HOST", "localhost")
-        try:
-            self.r = redis.Redis(host=self.redis_host, port=6379, db=0, decode_responses=True)
-            # Check connection
-            self.r.ping()
-            self.redis_available = True
-        except redis.ConnectionError:
-            self.redis_available = False
-
-        self.lock_key = "login_lock"
-        self.fail_key = "login_failures"
-        self.lock_duration = 30
-        self.max_failures = 3
-
-    def is_redis_available(self):
-        return self.redis_available
-    
+        # Shared, process-wide connection pool; nothing is sent until the first attempt
+        self.r = get_redis()
+        self.login_script = self.r.register_script(LOGIN_SCRIPT)
+
+        self.window_seconds = int(os.environ.get("LOGIN_WINDOW_SECONDS", "300"))
+        self.lock_duration = int(os.environ.get("LOGIN_LOCK_SECONDS", "30"))
+        self.max_failures = int(os.environ.get("LOGIN_MAX_FAILURES", "3"))
+        self.max_client_failures = int(os.environ.get("LOGIN_MAX_FAILURES_PER_CLIENT", "20"))
+
     def get_redis_host(self):
         return self.redis_host
 
-    def get_lock_status(self):
-        """
-        Returns (is_locked, ttl)
-        """
-        if not self.redis_available:
-            return False, 0
-            
-        if self.r.exists(self.lock_key):
-            return True, self.r.ttl(self.lock_key)
-        return False, 0
-
     def verify_credentials(self, username, password):
         env_user = os.environ.get("LOGIN_USER")
         env_password = os.environ.get("LOGIN_PASSWORD")
@@ -43,26 +75,46 @@ class AuthService:
         if not env_user or not env_password:
             raise ValueError("Login credentials are not configured in the environment.")
 
-        if username == env_user and password == env_password:
-            if self.redis_available:
-                self.r.delete(self.fail_key)
-            return True
-        return False
+        return username == env_user and password == env_password
 
-    def record_failure(self):
+    def attempt_login(self, client_id, username, password):
         """
-        Increments failure count. Returns (is_locked, duration_if_locked).
+        Checks the credentials and applies the limiter in a single atomic script.
+        Returns (status, info):
+        ("ok", 0), ("locked", ttl), ("locked_now", lock_duration) or ("failed", attempts_left).
+        Raises redis.RedisError if Redis is unreachable.
         """
-        if not self.redis_available:
-            return False, 0
-
-        failures = self.r.incr(self.fail_key)
-        if failures >= self.max_failures:
-            self.r.setex(self.lock_key, self.lock_duration, "locked")
-            self.r.delete(self.fail_key)
-            return True, self.lock_duration
-        
-        return False, self.max_failures - failures
+        success = self.verify_credentials(username, password)
+        keys = [
+            f"login:failures:{client_id}:{username}",
+            f"login:failures:{client_id}",
+            f"login:lock:{client_id}:{username}",
+            f"login:lock:{client_id}",
+        ]
+        status, info = self.login_script(
+            keys=keys,
+            args=[1 if success else 0, self.window_seconds * 1000, self.max_failures,
+                  self.max_client_failures, self.lock_duration, uuid.uuid4().hex],
+        )
+        return status, int(info)
+
+
+def get_client_id():
+    """
+    Identifies the browser's client for the login limiter: its IP address, taken from
+    X-Forwarded-For only when LOGIN_TRUST_FORWARDED_FOR=1 (i.e. behind a trusted proxy).
+    When Streamlit doesn't know the address, the forwarded address or else an id kept in the
+    session is used, so clients without one don't share a single lockout.
+    """
+    forwarded = st.context.headers.get("X-Forwarded-For", "").split(",")[0].strip()
+    if forwarded and os.environ.get("LOGIN_TRUST_FORWARDED_FOR") == "1":
+        return forwarded
+    ip_address = getattr(st.context, "ip_address", None) or forwarded
+    if ip_address:
+        return ip_address
+    if "login_client_id" not in st.session_state:
+        st.session_state["login_client_id"] = f"session:{uuid.uuid4().hex}"
+    return st.session_state["login_client_id"]
 
 
 def require_auth():
@@ -76,44 +128,31 @@ def require_auth():
 
     auth_service = AuthService()
 
-    if not auth_service.is_redis_available():
-        st.error(f"Cannot connect to Redis at {auth_service.get_redis_host()}. Login unavailable.")
-        st.stop()
-        return False
-
-    # Check for Global Lock
-    is_locked, ttl = auth_service.get_lock_status()
-    if is_locked:
-        st.error(f"⚠️ Too many failed attempts. Login locked. Please wait {ttl} seconds.")
-
-    # Strict mode check (indirectly handled by verify_credentials but good to show error early if possible, 
-    # though verify_credentials raises ValueError which we can catch)
-
     st.header("Login Request")
-    
+
     with st.form("credentials"):
         username = st.text_input("Username", key="username")
         password = st.text_input("Password", type="password", key="password")
         submit = st.form_submit_button("Login")
-        
+
         if submit:
-            if is_locked:
-                pass
-            else:
-                try:
-                    if auth_service.verify_credentials(username, password):
-                        st.session_state["password_correct"] = True
-                        st.rerun()
-                    else:
-                        locked_now, info = auth_service.record_failure()
-                        if locked_now:
-                            st.error(f"❌ Incorrect. Login locked for {info} seconds.")
-                        else:
-                            st.error(f"😕 User not known or password incorrect. {info} attempts remaining.")
-                except ValueError as e:
-                    st.error(str(e))
-                    st.stop()
-    
+            try:
+                status, info = auth_service.attempt_login(get_client_id(), username, password)
+                if status == "ok":
+                    st.session_state["password_correct"] = True
+                    st.rerun()
+                elif status == "locked":
+                    st.error(f"⚠️ Too many failed attempts. Login locked. Please wait {info} seconds.")
+                elif status == "locked_now":
+                    st.error(f"❌ Incorrect. Login locked for {info} seconds.")
+                else:
+                    st.error(f"😕 User not known or password incorrect. {info} attempts remaining.")
+            except ValueError as e:
+                st.error(str(e))
+                st.stop()
+            except redis.RedisError:
+                st.error(f"Cannot connect to Redis at {auth_service.get_redis_host()}. Login unavailable.")
+
     st.stop()
     return False
 
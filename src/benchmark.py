@@ -0,0 +1,353 @@
+import argparse
+import inspect
+import io
+import json
+import math
+import os
+import random
+import threading
+import time
+import wave
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import psycopg2
+import redis
+
+from fake_openai import FakeOpenAI
+
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench-password"
+# 8-bit mono at 8 kHz: 8000 bytes per second, the rate the fake Whisper assumes
+SAMPLE_RATE = 8000
+
+
+class Recorder:
+    """
+    Thread-safe collection of per-stage latencies and errors.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def fail(self, stage, error):
+        with self.lock:
+            self.errors.setdefault(stage, []).append(f"{type(error).__name__}: {error}")
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.fail(stage, e)
+            raise
+        self.add(stage, time.perf_counter() - start)
+
+    def summary(self):
+        with self.lock:
+            stages = sorted(set(self.samples) | set(self.errors))
+            return {stage: summarize(self.samples.get(stage, []), len(self.errors.get(stage, [])))
+                    for stage in stages}
+
+
+def percentile(sorted_values, p):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(values, errors):
+    values = sorted(values)
+    to_ms = (lambda v: None if v is None else round(v * 1000, 2))
+    return {
+        "count": len(values),
+        "errors": errors,
+        "mean_ms": to_ms(sum(values) / len(values)) if values else None,
+        "p50_ms": to_ms(percentile(values, 50)),
+        "p95_ms": to_ms(percentile(values, 95)),
+        "p99_ms": to_ms(percentile(values, 99)),
+        "max_ms": to_ms(values[-1]) if values else None,
+    }
+
+
+def instrument(recorder, obj, method, stage):
+    """
+    Replaces obj.method on this instance with a wrapper that records its latency.
+    Generators also record the time to their first item as "<stage>_first_token".
+    """
+    func = getattr(obj, method)
+
+    if inspect.isgeneratorfunction(func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            first = True
+            try:
+                for item in func(*args, **kwargs):
+                    if first:
+                        recorder.add(f"{stage}_first_token", time.perf_counter() - start)
+                        first = False
+                    yield item
+            except Exception as e:
+                recorder.fail(stage, e)
+                raise
+            recorder.add(stage, time.perf_counter() - start)
+    else:
+        def wrapper(*args, **kwargs):
+            with recorder.timed(stage):
+                return func(*args, **kwargs)
+
+    setattr(obj, method, wrapper)
+
+
+def synthetic_recording(minutes):
+    """
+    A WAV file of near-silent noise; the noise makes every recording unique,
+    so the transcription cache doesn't hide the work being measured.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(1)
+        wav.setframerate(SAMPLE_RATE)
+        frames = int(minutes * 60 * SAMPLE_RATE)
+        wav.writeframes(bytes(random.choices(range(126, 131), k=frames)))
+    return buffer.getvalue()
+
+
+@contextmanager
+def ephemeral_database(keep=False):
+    """
+    Creates a scratch database next to DB_NAME on the configured server and points DB_NAME at it.
+    """
+    name = f"bench_{os.getpid()}_{int(time.time())}"
+    admin = psycopg2.connect(host=os.getenv("DB_HOST"), port=os.getenv("DB_PORT"), database=os.getenv("DB_NAME"),
+                             user=os.getenv("DB_USER"), password=os.getenv("DB_PASS"))
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cur:
+            cur.execute(f'CREATE DATABASE "{name}"')
+        os.environ["DB_NAME"] = name
+        yield name
+    finally:
+        if not keep:
+            with admin.cursor() as cur:
+                cur.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+        admin.close()
+
+
+def configure_environment(args, fake):
+    """
+    Points every client at the stand-ins. Must run before the app modules are imported,
+    since some of them read their settings at import time.
+    """
+    os.environ.setdefault("DB_HOST", "localhost")
+    os.environ.setdefault("DB_USER", "postgres")
+    os.environ.setdefault("DB_PASS", "postgres")
+    os.environ.setdefault("DB_NAME", "postgres")
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = fake.base_url
+    os.environ["OPENAI_API_BASE"] = fake.base_url
+    os.environ["REDIS_DB"] = str(args.redis_db)
+    os.environ["LOGIN_USER"] = BENCH_USER
+    os.environ["LOGIN_PASSWORD"] = BENCH_PASSWORD
+    os.environ["ANALYSIS_MODE"] = args.analysis_mode
+    # The app's own limiter is part of what's measured; size it to the fake API's limits
+    os.environ["RATE_LIMIT_WHISPER_RPM"] = str(args.whisper_rpm or 100000)
+    os.environ["RATE_LIMIT_CHAT_RPM"] = str(args.chat_rpm or 100000)
+    os.environ["RATE_LIMIT_CHAT_TPM"] = str(args.chat_tpm)
+
+
+def simulate_user(user, args, recorder, totals, totals_lock, start_barrier):
+    from auth import AuthService
+    from prompts import DEFAULT_ANALYSIS_PROMPT
+    from services.interview_orchestrator import InterviewOrchestrator
+
+    try:
+        # One orchestrator per user; pools and OpenAI clients are shared process-wide, as in the app
+        orchestrator = InterviewOrchestrator()
+        instrument(recorder, orchestrator, "transcribe", "transcribe")
+        instrument(recorder, orchestrator, "stream_analysis", "analysis_stream")
+        instrument(recorder, orchestrator.llm_service, "transcribe_audio", "openai_transcribe")
+        instrument(recorder, orchestrator.llm_service, "analyze_interview", "openai_analyze")
+        instrument(recorder, orchestrator.db, "save_transcription", "db_save_transcription")
+        instrument(recorder, orchestrator.db, "save_analysis_versions", "db_save_analysis")
+    except Exception as e:
+        print(f"user {user}: setup failed: {type(e).__name__}: {e}")
+        orchestrator = None
+    # Start every user at once, after the (slow) client setup
+    start_barrier.wait()
+    if orchestrator is None:
+        return
+
+    for i in range(args.interviews_per_user):
+        try:
+            with recorder.timed("login"):
+                status, _ = AuthService().attempt_login(f"benchmark-client-{user}", BENCH_USER, BENCH_PASSWORD)
+                if status != "ok":
+                    raise RuntimeError(f"benchmark login was rejected: {status}")
+
+            with recorder.timed("get_all_interviews"):
+                orchestrator.get_all_interviews()
+
+            minutes = random.uniform(args.min_minutes, args.max_minutes)
+            recording = synthetic_recording(minutes)
+            with recorder.timed("process_new_interview"):
+                interview_id = orchestrator.process_new_interview(
+                    f"user{user}_interview{i}.wav", recording, DEFAULT_ANALYSIS_PROMPT
+                )
+
+            transcription = orchestrator.db.get_interview_field(interview_id, "transcription")
+            new_prompt = f"{DEFAULT_ANALYSIS_PROMPT}\n\nPay extra attention to leadership. (run {user}-{i})"
+            with recorder.timed("reanalyze_interview"):
+                orchestrator.reanalyze_interview(interview_id, transcription, new_prompt)
+
+            with totals_lock:
+                totals["interviews"] += 1
+                totals["audio_minutes"] += minutes
+        except Exception as e:
+            print(f"user {user}, interview {i}: {type(e).__name__}: {e}")
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nChange vs {previous_path} ({previous.get('started_at')}):")
+    for stage, stats in current["stages"].items():
+        before = previous.get("stages", {}).get(stage)
+        if not before:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if stats[key] and before.get(key):
+                changes.append(f"{key[:-3]} {(stats[key] - before[key]) / before[key] * 100:+.1f}%")
+        print(f"  {stage:<28} {', '.join(changes)}")
+    old_rate = previous.get("throughput", {}).get("interviews_per_minute")
+    if old_rate:
+        new_rate = current["throughput"]["interviews_per_minute"]
+        print(f"  {'throughput':<28} {(new_rate - old_rate) / old_rate * 100:+.1f}%")
+
+
+def print_report(report):
+    print(f"\n{'stage':<28} {'count':>6} {'errors':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for stage, s in report["stages"].items():
+        cells = [f"{s[key]:>10.1f}" if s[key] is not None else f"{'-':>10}"
+                 for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        print(f"{stage:<28} {s['count']:>6} {s['errors']:>6} {' '.join(cells)}")
+    t = report["throughput"]
+    print(f"\n{t['interviews']} interviews in {report['duration_seconds']:.1f}s: "
+          f"{t['interviews_per_minute']:.2f} interviews/min, {t['audio_minutes_per_minute']:.2f} audio-min/min")
+    print(f"Fake OpenAI: {report['fake_openai']}")
+    http = report.get("openai_http", {})
+    if http.get("requests"):
+        print(f"OpenAI HTTP: {http['requests']} requests over {http['connections_opened']} connections "
+              f"({(1 - http['connections_opened'] / http['requests']) * 100:.0f}% reused)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Load test the interview pipeline against a fake OpenAI API, a scratch Postgres "
+                    "database and a separate Redis database."
+    )
+    parser.add_argument("--users", type=int, default=8, help="Concurrent simulated users")
+    parser.add_argument("--interviews-per-user", type=int, default=3)
+    parser.add_argument("--min-minutes", type=float, default=1, help="Shortest synthetic interview")
+    parser.add_argument("--max-minutes", type=float, default=20, help="Longest synthetic interview")
+    parser.add_argument("--analysis-mode", choices=("single", "sections"), default="single")
+    parser.add_argument("--whisper-latency", type=float, default=1.0, help="Fake Whisper seconds per request")
+    parser.add_argument("--whisper-latency-per-mb", type=float, default=0.5, help="Fake Whisper seconds per MB")
+    parser.add_argument("--chat-latency", type=float, default=0.5, help="Fake chat seconds to first token")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Fake chat seconds per token")
+    parser.add_argument("--completion-tokens", type=int, default=400, help="Fake chat tokens per completion")
+    parser.add_argument("--whisper-rpm", type=int, default=0, help="Fake Whisper requests/min (0: unlimited)")
+    parser.add_argument("--chat-rpm", type=int, default=0, help="Fake chat requests/min (0: unlimited)")
+    parser.add_argument("--chat-tpm", type=int, default=0, help="Chat tokens/min for the app's limiter (0: off)")
+    parser.add_argument("--redis-db", type=int, default=15, help="Redis database to use; it is flushed")
+    parser.add_argument("--keep-db", action="store_true", help="Don't drop the scratch database afterwards")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.redis_db == 0:
+        raise SystemExit("Refusing to flush Redis database 0; pass a dedicated --redis-db.")
+
+    fake = FakeOpenAI(args.whisper_latency, args.whisper_latency_per_mb, args.chat_latency, args.token_latency,
+                      args.completion_tokens, args.whisper_rpm, args.chat_rpm).start()
+    configure_environment(args, fake)
+    scratch_redis = redis.Redis(host=os.environ.get("REDIS_HOST", "localhost"),
+                                port=int(os.environ.get("REDIS_PORT", "6379")), db=args.redis_db)
+    scratch_redis.flushdb()
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    recorder = Recorder()
+    totals = {"interviews": 0, "audio_minutes": 0.0}
+    totals_lock = threading.Lock()
+    try:
+        with ephemeral_database(keep=args.keep_db) as db_name:
+            from database import get_pool
+
+            # What a fresh app process pays before its first page and its first OpenAI call
+            with recorder.timed("import_app"):
+                from services import clients, metrics
+                import services.interview_orchestrator  # noqa: F401
+            with recorder.timed("load_llm_clients"):
+                clients.openai_client()
+
+            print(f"Benchmarking {args.users} users x {args.interviews_per_user} interviews "
+                  f"against {fake.base_url}, database {db_name}, Redis db {args.redis_db}")
+            start_barrier = threading.Barrier(args.users + 1)
+            users = [
+                threading.Thread(target=simulate_user,
+                                 args=(user, args, recorder, totals, totals_lock, start_barrier))
+                for user in range(args.users)
+            ]
+            for thread in users:
+                thread.start()
+            start_barrier.wait()
+            start = time.perf_counter()
+            for thread in users:
+                thread.join()
+            duration = time.perf_counter() - start
+            pool_stats = get_pool().stats() if get_pool() else {}
+            http_requests, http_connections = metrics.get_http_counts()
+    finally:
+        scratch_redis.flushdb()
+        fake.stop()
+
+    minutes = max(duration, 1e-6) / 60
+    report = {
+        "started_at": started_at,
+        "config": vars(args),
+        "duration_seconds": round(duration, 3),
+        "throughput": {
+            "interviews": totals["interviews"],
+            "interviews_per_minute": round(totals["interviews"] / minutes, 3),
+            "audio_minutes_per_minute": round(totals["audio_minutes"] / minutes, 3),
+        },
+        "stages": recorder.summary(),
+        "fake_openai": fake.get_stats(),
+        "db_pool": pool_stats,
+        "openai_http": {"requests": http_requests, "connections_opened": http_connections},
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
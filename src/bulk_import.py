@@ -0,0 +1,112 @@
+import argparse
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from prompts import DEFAULT_ANALYSIS_PROMPT
+from services.audio_segmenter import probe_duration
+from services.audio_upload import AudioUpload
+from services.interview_orchestrator import InterviewOrchestrator
+from services.transcription_cache import hash_file
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".mp4")
+
+
+def find_recordings(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Transcribe and analyze every recording in a directory.")
+    parser.add_argument("directory", help="Directory to scan (recursively) for recordings")
+    parser.add_argument("--prompt-file", help="File with the analysis prompt (default: the app's default prompt)")
+    parser.add_argument("--transcribe-concurrency", type=int, default=4, help="Recordings transcribed at once")
+    parser.add_argument("--analyze-concurrency", type=int, default=4, help="Transcripts analyzed at once")
+    parser.add_argument("--batch-size", type=int, default=20, help="Interviews written per database transaction")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    system_prompt = DEFAULT_ANALYSIS_PROMPT
+    if args.prompt_file:
+        with open(args.prompt_file) as f:
+            system_prompt = f.read()
+
+    orchestrator = InterviewOrchestrator()
+    # Yield the shared OpenAI budget to people using the app
+    orchestrator.llm_service.priority = "bulk"
+    db = orchestrator.db
+
+    # Hash everything first: resuming skips by content, so renamed or moved files are still recognized
+    recordings = {}
+    for path in find_recordings(args.directory):
+        recordings.setdefault(hash_file(path), path)
+    done = db.get_imported_hashes(recordings.keys())
+    pending = [(audio_hash, path) for audio_hash, path in recordings.items() if audio_hash not in done]
+    print(f"Found {len(recordings)} recordings, {len(done)} already imported, {len(pending)} to process.")
+    if not pending:
+        return
+
+    results = queue.Queue()
+    start = time.perf_counter()
+
+    def analyze(audio_hash, path, transcription_text):
+        try:
+            analysis_text = orchestrator.analyze(transcription_text, system_prompt)
+            results.put((audio_hash, path, transcription_text, analysis_text, None))
+        except Exception as e:
+            results.put((audio_hash, path, None, None, f"analysis failed: {e}"))
+
+    with ThreadPoolExecutor(max_workers=args.analyze_concurrency) as analyze_pool:
+        def transcribe(audio_hash, path):
+            try:
+                upload = AudioUpload(os.path.basename(path), path=path)
+                transcription_text = orchestrator.transcribe(upload, audio_hash)
+                analyze_pool.submit(analyze, audio_hash, path, transcription_text)
+            except Exception as e:
+                results.put((audio_hash, path, None, None, f"transcription failed: {e}"))
+
+        with ThreadPoolExecutor(max_workers=args.transcribe_concurrency) as transcribe_pool:
+            for audio_hash, path in pending:
+                transcribe_pool.submit(transcribe, audio_hash, path)
+
+            batch, failures = [], []
+            imported, failed, audio_seconds = 0, 0, 0.0
+            for finished in range(1, len(pending) + 1):
+                audio_hash, path, transcription_text, analysis_text, error = results.get()
+                if error:
+                    print(f"[{finished}/{len(pending)}] {path}: {error}")
+                    failures.append((audio_hash, path, error))
+                    failed += 1
+                else:
+                    print(f"[{finished}/{len(pending)}] {path}: done")
+                    batch.append((audio_hash, path, os.path.basename(path), system_prompt,
+                                  transcription_text, analysis_text))
+                    audio_seconds += probe_duration(path) or 0.0
+
+                if len(batch) >= args.batch_size or finished == len(pending):
+                    interview_ids = db.save_imported_interviews(batch, orchestrator.llm_service.analysis_model)
+                    if interview_ids is None:
+                        print(f"Could not save a batch of {len(batch)} interviews; they count as failed.")
+                        failures.extend((row[0], row[1], "saving failed") for row in batch)
+                        failed += len(batch)
+                    else:
+                        imported += len(interview_ids)
+                    batch = []
+                if len(failures) >= args.batch_size or finished == len(pending):
+                    db.record_import_failures(failures)
+                    failures = []
+
+    elapsed_minutes = max(time.perf_counter() - start, 1e-6) / 60
+    print(f"Imported {imported} of {len(pending)} recordings in {elapsed_minutes:.1f} min "
+          f"({imported / elapsed_minutes:.1f} files/min, "
+          f"{audio_seconds / 60 / elapsed_minutes:.1f} audio-min/min). "
+          f"{failed} failed; failed recordings are retried on the next run.")
+
+
+if __name__ == "__main__":
+    main()
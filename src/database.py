@@ -1,129 +1,1395 @@
+import hashlib
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+
 import psycopg2
-from datetime import datetime
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
 
-class Database:
-    def __init__(self):
-        self.conn = None
-        self.connect()
-        self.init_db()
 
-    def connect(self):
+class ConnectionPool:
+    """
+    Process-wide, thread-safe pool of psycopg2 connections.
+    Callers block (up to `timeout` seconds) when every connection is checked out,
+    and connections that died while idle are transparently replaced.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=30, ping_after=30, **conn_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.conn_kwargs = conn_kwargs
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+
+        self.opened = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.reconnects = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
         try:
-            self.conn = psycopg2.connect(
-                host=os.getenv("DB_HOST"),
-                port=os.getenv("DB_PORT"),
-                database=os.getenv("DB_NAME"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASS"),
-            )
-        except Exception as e:
-            print(f"Database connection failed: {e}")
-            self.conn = None
+            for _ in range(minconn):
+                self._idle.put(self._open())
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        conn = psycopg2.connect(**self.conn_kwargs)
+        with self._lock:
+            self.opened += 1
+            self._last_used[id(conn)] = time.monotonic()
+        return conn
 
-    def init_db(self):
-        if not self.conn:
+    def _discard(self, conn):
+        with self._lock:
+            self.opened -= 1
+            self._last_used.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn):
+        if conn.closed:
+            return False
+        # Only pay for a round trip when the connection sat idle long enough
+        # for the server, a proxy or a NAT to have dropped it.
+        idle_for = time.monotonic() - self._last_used.get(id(conn), 0)
+        if idle_for < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _checkout(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+
+        if self._is_alive(conn):
+            return conn
+
+        self._discard(conn)
+        with self._lock:
+            self.reconnects += 1
+        return self._open()
+
+    def _release(self, conn, broken=False):
+        if broken or conn.closed:
+            self._discard(conn)
             return
-        
-        query = """
-        CREATE TABLE IF NOT EXISTS interviews (
-            id SERIAL PRIMARY KEY,
-            audio_filename TEXT NOT NULL,
-            analysis_prompt TEXT,
-            transcription TEXT,
-            analysis TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
+        try:
+            if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._discard(conn)
+            return
+        with self._lock:
+            self._last_used[id(conn)] = time.monotonic()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks a connection out of the pool for the duration of the `with` block.
+        Any transaction left open by the caller is rolled back on release.
         """
+        start = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        waited = time.monotonic() - start
+        with self._lock:
+            self.waiting -= 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        if not acquired:
+            raise psycopg2.pool.PoolError(f"No database connection available after {self.timeout}s.")
+
         try:
-            with self.conn.cursor() as cur:
-                cur.execute(query)
-            self.conn.commit()
-        except Exception as e:
-            print(f"Error initializing DB: {e}")
-            self.conn.rollback()
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._release(conn, broken)
+            self._slots.release()
+
+    def close(self):
+        """
+        Closes the idle connections. Used when a pool is given up, e.g. after a failed init_db.
+        """
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_size": self.maxconn,
+                "open": self.opened,
+                "in_use": self.in_use,
+                "idle": self._idle.qsize(),
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "reconnects": self.reconnects,
+                "avg_wait_ms": (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide connection pool, creating it (and the schema) on first use.
+    Returns None if the database is unreachable; the next call will try again.
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            pool = None
+            try:
+                pool = ConnectionPool(
+                    minconn=int(os.getenv("DB_POOL_MIN", "1")),
+                    maxconn=int(os.getenv("DB_POOL_MAX", "10")),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                    ping_after=float(os.getenv("DB_POOL_PING_AFTER", "30")),
+                    host=os.getenv("DB_HOST"),
+                    port=os.getenv("DB_PORT"),
+                    database=os.getenv("DB_NAME"),
+                    user=os.getenv("DB_USER"),
+                    password=os.getenv("DB_PASS"),
+                )
+                init_db(pool)
+                _pool = pool
+            except Exception as e:
+                print(f"Database connection failed: {e}")
+                # Otherwise every retry would leave another set of connections open
+                if pool is not None:
+                    pool.close()
+    return _pool
+
+
+INTERVIEW_COMPRESSION = os.getenv("INTERVIEW_COMPRESSION", "lz4")
+INTERVIEW_PARTITIONS_AHEAD = int(os.getenv("INTERVIEW_PARTITIONS_AHEAD", "3"))
+# Rows wider than this have their transcript/analysis compressed and moved out of line,
+# so the heap the sidebar listing walks holds little more than ids, filenames and dates
+INTERVIEW_TOAST_TUPLE_TARGET = 256
+INTERVIEW_COLUMNS = ("id", "audio_filename", "analysis_prompt", "transcription", "analysis", "created_at", "updated_at")
+# Catches rows outside the monthly partitions; they move to their month's partition when it is created
+INTERVIEW_DEFAULT_PARTITION = "interviews_default"
+
+
+def month_start(day, months=0):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def interview_partition_name(month):
+    return f"interviews_y{month.year}m{month.month:02d}"
+
+
+def create_interviews_table(cur, table="interviews"):
+    """
+    Creates `table` as the interviews table partitioned by month of created_at, with a
+    default partition for anything outside the monthly ones. The primary key has to
+    include the partition key, hence (id, created_at). Servers without per-column
+    compression (before Postgres 14, or built without lz4) get the table without it.
+    """
+    cur.execute("SAVEPOINT create_interviews;")
+    try:
+        _create_interviews_table(cur, table, f" COMPRESSION {INTERVIEW_COMPRESSION}")
+    except psycopg2.Error as e:
+        print(f"Interview compression unavailable, creating {table} without it: {e}")
+        cur.execute("ROLLBACK TO SAVEPOINT create_interviews;")
+        _create_interviews_table(cur, table, "")
+    if table == "interviews":
+        cur.execute("ALTER SEQUENCE interviews_id_seq OWNED BY interviews.id;")
+
+
+def _create_interviews_table(cur, table, compression):
+    cur.execute(f"""
+    CREATE SEQUENCE IF NOT EXISTS interviews_id_seq AS INTEGER;
+    CREATE TABLE {table} (
+        id INTEGER NOT NULL DEFAULT nextval('interviews_id_seq'),
+        audio_filename TEXT NOT NULL,
+        analysis_prompt TEXT,
+        transcription TEXT{compression},
+        analysis TEXT{compression},
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        transcription_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', coalesce(transcription, ''))) STORED,
+        analysis_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', coalesce(analysis, ''))) STORED,
+        CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+    CREATE TABLE {INTERVIEW_DEFAULT_PARTITION} PARTITION OF {table} DEFAULT
+        WITH (toast_tuple_target = {INTERVIEW_TOAST_TUPLE_TARGET});
+    CREATE INDEX idx_{table}_created_at_id ON {table} (created_at DESC, id DESC);
+    CREATE INDEX idx_{table}_transcription_tsv ON {table} USING gin (transcription_tsv);
+    CREATE INDEX idx_{table}_analysis_tsv ON {table} USING gin (analysis_tsv);
+    """)
+
+
+def interviews_partitioned(cur, table="interviews"):
+    cur.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s);", (table,))
+    row = cur.fetchone()
+    return bool(row and row[0])
+
+
+def ensure_interview_partitions(cur, first_month, last_month, table="interviews"):
+    """
+    Creates the missing monthly partitions from `first_month` to `last_month` (inclusive).
+    Rows of that month already in the default partition are moved into the new one.
+    Returns the names of the partitions created.
+    """
+    columns = ", ".join(INTERVIEW_COLUMNS)
+    created = []
+    month = first_month
+    while month <= last_month:
+        name = interview_partition_name(month)
+        bounds = (month, month_start(month, 1))
+        cur.execute("SELECT to_regclass(%s) IS NULL;", (name,))
+        if cur.fetchone()[0]:
+            cur.execute("SAVEPOINT partition;")
+            try:
+                # Postgres refuses a partition for a month that still has rows in the default
+                # one, so they are set aside first; the lock keeps new ones from arriving meanwhile
+                cur.execute(f"LOCK TABLE {INTERVIEW_DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE;")
+                cur.execute(
+                    f"CREATE TEMP TABLE interviews_moved AS SELECT {columns} FROM {INTERVIEW_DEFAULT_PARTITION} "
+                    f"WHERE created_at >= %s AND created_at < %s;",
+                    bounds,
+                )
+                cur.execute(
+                    f"DELETE FROM {INTERVIEW_DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s;", bounds
+                )
+                moved = cur.rowcount
+                cur.execute(
+                    f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s) "
+                    f"WITH (toast_tuple_target = {INTERVIEW_TOAST_TUPLE_TARGET});",
+                    bounds,
+                )
+                cur.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM interviews_moved;")
+                cur.execute("DROP TABLE interviews_moved;")
+                created.append(name)
+                if moved:
+                    print(f"Moved {moved} interviews from {INTERVIEW_DEFAULT_PARTITION} to {name}.")
+            except psycopg2.Error as e:
+                print(f"Could not create partition {name}: {e}")
+                cur.execute("ROLLBACK TO SAVEPOINT partition;")
+        month = month_start(month, 1)
+    return created
+
+
+def ensure_upcoming_interview_partitions(cur):
+    """
+    Creates the partitions of this month and the next INTERVIEW_PARTITIONS_AHEAD ones, plus
+    those of any month that has rows in the default partition. Does nothing on a plain table.
+    """
+    if not interviews_partitioned(cur):
+        return []
+    this_month = month_start(date.today())
+    created = ensure_interview_partitions(cur, this_month, month_start(this_month, INTERVIEW_PARTITIONS_AHEAD))
+    cur.execute(f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {INTERVIEW_DEFAULT_PARTITION};")
+    for (month,) in cur.fetchall():
+        created += ensure_interview_partitions(cur, month, month)
+    return created
+
+
+def set_interview_compression(cur, table="interviews"):
+    """
+    Compresses transcripts and analyses with INTERVIEW_COMPRESSION when they are written
+    (Postgres decompresses them transparently on read). Existing values keep their
+    compression until they are rewritten, e.g. by migrate_interviews.py.
+    """
+    cur.execute(
+        "SELECT attcompression FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = 'transcription';",
+        (table,),
+    )
+    row = cur.fetchone()
+    # pg_attribute stores the method's first letter: 'l' for lz4, 'p' for pglz
+    if row and row[0] != INTERVIEW_COMPRESSION[0]:
+        cur.execute(
+            f"ALTER TABLE {table} ALTER COLUMN transcription SET COMPRESSION {INTERVIEW_COMPRESSION}, "
+            f"ALTER COLUMN analysis SET COMPRESSION {INTERVIEW_COMPRESSION};"
+        )
+
+
+def init_db(pool):
+    """
+    Creates the schema. Runs once per process, when the pool is created.
+    """
+    # interviews itself is created by create_interviews_table, with its full-text search columns;
+    # databases from before partitioning keep a plain table until migrate_interviews.py converts
+    # it (or adds the search columns), since that rewrites the whole table
+    query = """
+    CREATE TABLE IF NOT EXISTS transcription_cache (
+        audio_hash TEXT PRIMARY KEY,
+        transcription TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_transcription_cache_last_used_at ON transcription_cache (last_used_at);
+
+    CREATE TABLE IF NOT EXISTS analysis_cache (
+        cache_key TEXT PRIMARY KEY,
+        analysis TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_used_at ON analysis_cache (last_used_at);
+
+    -- Bulk import progress, keyed by content hash so re-runs skip finished files
+    CREATE TABLE IF NOT EXISTS import_ledger (
+        audio_hash TEXT PRIMARY KEY,
+        source_path TEXT NOT NULL,
+        status TEXT NOT NULL,
+        interview_id INTEGER,
+        error TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Bumped on every analysis update so per-session caches can tell stale entries apart
+    ALTER TABLE interviews ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+    -- Keyset pagination of the sidebar listing
+    CREATE INDEX IF NOT EXISTS idx_interviews_created_at_id ON interviews (created_at DESC, id DESC);
+
+    -- What preprocessing saved per recording, and where its stretches sit in the original
+    CREATE TABLE IF NOT EXISTS audio_preprocessing (
+        audio_hash TEXT PRIMARY KEY,
+        original_bytes BIGINT NOT NULL,
+        processed_bytes BIGINT NOT NULL,
+        original_seconds DOUBLE PRECISION NOT NULL,
+        processed_seconds DOUBLE PRECISION NOT NULL,
+        timestamp_map JSONB NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    -- Databases that briefly had the column dropped; a nullable column without a default is a catalog-only change
+    ALTER TABLE audio_preprocessing ADD COLUMN IF NOT EXISTS timestamp_map JSONB;
+
+    -- One row per timed pipeline stage; a trace's root span has stage = operation
+    CREATE TABLE IF NOT EXISTS pipeline_metrics (
+        id BIGSERIAL PRIMARY KEY,
+        trace_id TEXT NOT NULL,
+        operation TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        interview_id INTEGER,
+        started_at TIMESTAMPTZ NOT NULL,
+        duration_ms DOUBLE PRECISION NOT NULL,
+        error TEXT,
+        attributes JSONB NOT NULL DEFAULT '{}'
+    );
+    CREATE INDEX IF NOT EXISTS idx_pipeline_metrics_started_at ON pipeline_metrics (started_at);
+    CREATE INDEX IF NOT EXISTS idx_pipeline_metrics_stage_started_at ON pipeline_metrics (stage, started_at);
+    CREATE INDEX IF NOT EXISTS idx_pipeline_metrics_trace_id ON pipeline_metrics (trace_id);
+
+    -- Folded stack samples of profiled requests
+    CREATE TABLE IF NOT EXISTS request_profiles (
+        trace_id TEXT PRIMARY KEY,
+        operation TEXT NOT NULL,
+        samples INTEGER NOT NULL,
+        folded_stacks TEXT NOT NULL,
+        created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+    # Every completed analysis is kept; interviews.analysis holds the current one.
+    # No foreign key: delete_interview removes an interview's analyses itself.
+    analyses_query = """
+    CREATE TABLE analyses (
+        id SERIAL PRIMARY KEY,
+        interview_id INTEGER NOT NULL,
+        prompt_hash TEXT NOT NULL,
+        prompt TEXT NOT NULL,
+        model TEXT NOT NULL,
+        analysis TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_analyses_interview_id_created_at ON analyses (interview_id, created_at DESC);
+
+    -- Existing analyses become the first version of their interview
+    INSERT INTO analyses (interview_id, prompt_hash, prompt, model, analysis, created_at)
+    SELECT id, encode(sha256(convert_to(coalesce(analysis_prompt, ''), 'UTF8')), 'hex'),
+           coalesce(analysis_prompt, ''), 'unknown', analysis, coalesce(updated_at, created_at)
+    FROM interviews
+    WHERE analysis IS NOT NULL;
+    """
+    # Trigram index for filename search; optional because it needs the pg_trgm extension
+    trigram_query = """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_interviews_filename_trgm ON interviews USING gin (audio_filename gin_trgm_ops);
+    """
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            # App and worker processes start together; serialize their DDL
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext('jobby_schema'));")
+            cur.execute("SELECT to_regclass('interviews') IS NULL;")
+            if cur.fetchone()[0]:
+                create_interviews_table(cur)
+            cur.execute(query)
+            # Months ahead are created early so rows never land in the default partition
+            ensure_upcoming_interview_partitions(cur)
+            cur.execute("SAVEPOINT compression;")
+            try:
+                set_interview_compression(cur)
+            except psycopg2.Error as e:
+                print(f"Interview compression unavailable: {e}")
+                cur.execute("ROLLBACK TO SAVEPOINT compression;")
+            cur.execute("SELECT to_regclass('analyses') IS NULL;")
+            if cur.fetchone()[0]:
+                cur.execute(analyses_query)
+            cur.execute("SAVEPOINT trigram;")
+            try:
+                cur.execute(trigram_query)
+            except psycopg2.Error as e:
+                print(f"Filename search index unavailable: {e}")
+                cur.execute("ROLLBACK TO SAVEPOINT trigram;")
+        conn.commit()
+
+
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+COUNT_CACHE_TTL = float(os.getenv("INTERVIEW_COUNT_CACHE_TTL", "30"))
+
+
+def _invalidate_count_cache():
+    with _count_cache_lock:
+        _count_cache.clear()
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+class Database:
+    def __init__(self):
+        self.pool = get_pool()
+
+    def get_pool_stats(self):
+        if not self.pool:
+            return {}
+        return self.pool.stats()
 
     def save_transcription(self, analysis_prompt, filename, text):
-        if not self.conn:
+        if not self.pool:
             return None
-        
+
         query = """
         INSERT INTO interviews (analysis_prompt, audio_filename, transcription)
         VALUES (%s, %s, %s)
         RETURNING id;
         """
         try:
-            with self.conn.cursor() as cur:
-                cur.execute(query, (analysis_prompt, filename, text))
-                interview_id = cur.fetchone()[0]
-            self.conn.commit()
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (analysis_prompt, filename, text))
+                    interview_id = cur.fetchone()[0]
+                conn.commit()
+            _invalidate_count_cache()
             return interview_id
         except Exception as e:
             print(f"Error saving transcription: {e}")
-            self.conn.rollback()
             return None
 
     def update_analysis(self, interview_id, analysis_text, analysis_prompt=None):
-        if not self.conn:
+        if not self.pool:
             return
-        
+
         query = """
         UPDATE interviews
-        SET analysis = %s, analysis_prompt = %s
+        SET analysis = %s, analysis_prompt = %s, updated_at = CURRENT_TIMESTAMP
         WHERE id = %s;
         """
         try:
-            with self.conn.cursor() as cur:
-                cur.execute(query, (analysis_text, analysis_prompt, interview_id))
-            self.conn.commit()
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (analysis_text, analysis_prompt, interview_id))
+                conn.commit()
         except Exception as e:
             print(f"Error updating analysis: {e}")
-            self.conn.rollback()
 
+    def save_analysis_versions(self, interview_id, versions, make_current=False):
+        """
+        Stores completed analyses, given as (prompt, model, text), as new versions of the interview.
+        With `make_current`, the last one also becomes the interview's current analysis; if the
+        interview already has a version with that prompt, model and text (a cache hit, or a
+        re-analysis with an unchanged prompt), that version is reused instead of duplicated.
+        Returns the version ids, in order, or None if nothing could be saved.
+        """
+        if not versions:
+            return []
+        if not self.pool:
+            return None
+
+        insert = """
+        INSERT INTO analyses (interview_id, prompt_hash, prompt, model, analysis)
+        VALUES %s
+        RETURNING id;
+        """
+        # The matching version, and whether it is already the current analysis
+        existing_query = """
+        SELECT a.id, i.analysis IS NOT DISTINCT FROM a.analysis AND i.analysis_prompt IS NOT DISTINCT FROM a.prompt
+        FROM analyses a
+        JOIN interviews i ON i.id = a.interview_id
+        WHERE a.interview_id = %s AND a.prompt_hash = %s AND a.model = %s AND a.analysis = %s
+        ORDER BY a.created_at DESC, a.id DESC
+        LIMIT 1;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    existing = None
+                    if make_current:
+                        prompt, model, text = versions[-1]
+                        cur.execute(existing_query, (interview_id, prompt_hash(prompt), model, text))
+                        existing = cur.fetchone()
+                    new_versions = versions[:-1] if existing else versions
+                    analysis_ids = []
+                    if new_versions:
+                        analysis_ids = [
+                            row[0] for row in psycopg2.extras.execute_values(
+                                cur, insert,
+                                [(interview_id, prompt_hash(prompt), prompt, model, text)
+                                 for prompt, model, text in new_versions],
+                                page_size=len(new_versions), fetch=True,
+                            )
+                        ]
+                    if existing:
+                        analysis_ids.append(existing[0])
+                    if make_current and not (existing and existing[1]):
+                        prompt, _, text = versions[-1]
+                        cur.execute(
+                            """
+                            UPDATE interviews
+                            SET analysis = %s, analysis_prompt = %s, updated_at = CURRENT_TIMESTAMP
+                            WHERE id = %s;
+                            """,
+                            (text, prompt, interview_id),
+                        )
+                conn.commit()
+            return analysis_ids
+        except Exception as e:
+            print(f"Error saving analysis versions: {e}")
+            return None
+
+    def get_analysis_versions(self, interview_id):
+        """
+        Lists the analyses of an interview, newest first, without their text:
+        (id, prompt_hash, prompt, model, created_at, analysis_length).
+        """
+        if not self.pool:
+            return []
+
+        query = """
+        SELECT id, prompt_hash, prompt, model, created_at, length(analysis)
+        FROM analyses
+        WHERE interview_id = %s
+        ORDER BY created_at DESC, id DESC;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (interview_id,))
+                    return cur.fetchall()
+        except Exception as e:
+            print(f"Error getting analysis versions: {e}")
+            return []
+
+    def get_analysis_version(self, analysis_id):
+        """
+        Returns (id, interview_id, prompt, model, created_at, analysis).
+        """
+        if not self.pool:
+            return None
+
+        query = """
+        SELECT id, interview_id, prompt, model, created_at, analysis
+        FROM analyses
+        WHERE id = %s;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (analysis_id,))
+                    return cur.fetchone()
+        except Exception as e:
+            print(f"Error getting analysis version: {e}")
+            return None
+
+    def set_current_analysis(self, interview_id, analysis_id):
+        """
+        Makes a stored version the interview's current analysis.
+        """
+        if not self.pool:
+            return False
+
+        query = """
+        UPDATE interviews i
+        SET analysis = a.analysis, analysis_prompt = a.prompt, updated_at = CURRENT_TIMESTAMP
+        FROM analyses a
+        WHERE a.id = %s AND i.id = %s AND a.interview_id = i.id;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (analysis_id, interview_id))
+                    updated = cur.rowcount
+                conn.commit()
+            return updated == 1
+        except Exception as e:
+            print(f"Error setting current analysis: {e}")
+            return False
 
     def get_interview(self, interview_id):
-        if not self.conn:
+        if not self.pool:
             return None
-            
+
         # Explicitly select columns to ensure consistent indexing in main.py
         # 0: id, 1: filename, 2: transcription, 3: analysis, 4: prompt, 5: created_at
         query = """
-        SELECT id, audio_filename, transcription, analysis, analysis_prompt, created_at 
-        FROM interviews 
+        SELECT id, audio_filename, transcription, analysis, analysis_prompt, created_at
+        FROM interviews
         WHERE id = %s;
         """
         try:
-            with self.conn.cursor() as cur:
-                cur.execute(query, (interview_id,))
-                return cur.fetchone()
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (interview_id,))
+                    return cur.fetchone()
         except Exception as e:
             print(f"Error getting interview: {e}")
             return None
 
+    def get_interview_meta(self, interview_id):
+        """
+        Everything but the large text fields:
+        (id, filename, prompt, created_at, updated_at, transcription_bytes, analysis_bytes).
+        """
+        if not self.pool:
+            return None
+
+        # octet_length reads the stored size without detoasting the text
+        query = """
+        SELECT id, audio_filename, analysis_prompt, created_at, updated_at,
+            octet_length(transcription), octet_length(analysis)
+        FROM interviews
+        WHERE id = %s;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (interview_id,))
+                    return cur.fetchone()
+        except Exception as e:
+            print(f"Error getting interview metadata: {e}")
+            return None
+
+    def get_interview_field(self, interview_id, field):
+        if not self.pool:
+            return None
+        if field not in ("transcription", "analysis"):
+            raise ValueError(f"Unknown interview field: {field}")
+
+        query = f"SELECT {field} FROM interviews WHERE id = %s;"
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (interview_id,))
+                    row = cur.fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Error getting interview {field}: {e}")
+            return None
+
+    def get_transcription_page(self, interview_id, offset, length):
+        """
+        Returns (text, total_characters) for `length` characters of the transcription starting at `offset`.
+        """
+        if not self.pool:
+            return "", 0
+
+        query = """
+        SELECT substr(transcription, %s, %s), coalesce(char_length(transcription), 0)
+        FROM interviews
+        WHERE id = %s;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (offset + 1, length, interview_id))
+                    row = cur.fetchone()
+            return row if row else ("", 0)
+        except Exception as e:
+            print(f"Error getting transcription page: {e}")
+            return "", 0
+
     def get_all_interviews(self):
-        if not self.conn:
+        if not self.pool:
             return []
-            
+
         query = "SELECT id, audio_filename, created_at FROM interviews ORDER BY created_at DESC;"
         try:
-            with self.conn.cursor() as cur:
-                cur.execute(query)
-                return cur.fetchall()
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                    return cur.fetchall()
         except Exception as e:
             print(f"Error getting all interviews: {e}")
             return []
 
-    def delete_interview(self, interview_id):
-        if not self.conn:
-            return False
-            
-        query = "DELETE FROM interviews WHERE id = %s;"
+    def iter_export_batches(self, batch_size=500, include_versions=False):
+        """
+        Yields every interview, oldest first, in lists of up to `batch_size` rows, read through a
+        named (server-side) cursor so only one batch is ever held in memory. Rows are
+        (id, audio_filename, created_at, updated_at, analysis_prompt, transcription, analysis,
+        analyses), where `analyses` lists every analysis version (None unless `include_versions`).
+        Unlike the other methods this raises on errors: a silently truncated export is worse than none.
+        """
+        if not self.pool:
+            raise RuntimeError("Database is not available.")
+
+        versions = "NULL"
+        if include_versions:
+            versions = """(
+                SELECT json_agg(json_build_object(
+                    'id', a.id, 'prompt', a.prompt, 'model', a.model,
+                    'created_at', a.created_at, 'analysis', a.analysis
+                ) ORDER BY a.created_at, a.id)
+                FROM analyses a WHERE a.interview_id = i.id
+            )"""
+        query = f"""
+        SELECT i.id, i.audio_filename, i.created_at, i.updated_at, i.analysis_prompt,
+               i.transcription, i.analysis, {versions} AS analyses
+        FROM interviews i
+        ORDER BY i.id;
+        """
+        with self.pool.connection() as conn:
+            # The cursor lives in this transaction; the pool rolls it back (closing the cursor) on release
+            with conn.cursor(name="interview_export") as cur:
+                cur.itersize = batch_size
+                cur.execute(query)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    def list_interviews(self, limit=20, cursor=None, search=None):
+        """
+        Returns one page of (id, filename, created_at) rows, newest first, and the cursor
+        of the next page (None on the last page). `cursor` is the (created_at, id) of the
+        last row of the previous page; `search` filters on a filename substring.
+        """
+        if not self.pool:
+            return [], None
+
+        conditions, params = [], []
+        if search:
+            conditions.append("audio_filename ILIKE %s")
+            params.append(f"%{_escape_like(search)}%")
+        if cursor:
+            conditions.append("(created_at, id) < (%s, %s)")
+            params.extend(cursor)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        query = f"""
+        SELECT id, audio_filename, created_at
+        FROM interviews
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s;
+        """
         try:
-            with self.conn.cursor() as cur:
-                cur.execute(query, (interview_id,))
-            self.conn.commit()
-            return True
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    # One extra row tells us whether there is a next page
+                    cur.execute(query, (*params, limit + 1))
+                    rows = cur.fetchall()
+            if len(rows) > limit:
+                rows = rows[:limit]
+                return rows, (rows[-1][2], rows[-1][0])
+            return rows, None
+        except Exception as e:
+            print(f"Error listing interviews: {e}")
+            return [], None
+
+    def count_interviews(self, search=None):
+        """
+        Number of interviews (matching `search`), cached for INTERVIEW_COUNT_CACHE_TTL seconds.
+        """
+        if not self.pool:
+            return 0
+
+        now = time.monotonic()
+        with _count_cache_lock:
+            cached = _count_cache.get(search)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        query = "SELECT count(*) FROM interviews"
+        params = ()
+        if search:
+            query += " WHERE audio_filename ILIKE %s"
+            params = (f"%{_escape_like(search)}%",)
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query + ";", params)
+                    count = cur.fetchone()[0]
+            with _count_cache_lock:
+                _count_cache[search] = (now + COUNT_CACHE_TTL, count)
+            return count
+        except Exception as e:
+            print(f"Error counting interviews: {e}")
+            return 0
+
+    def search_interviews(self, text, limit=10):
+        """
+        Full-text search over transcripts and analyses (web-search syntax: "quoted phrases", -exclusions, or).
+        Returns (id, filename, created_at, rank, transcription_snippet, analysis_snippet) rows, best first;
+        matched terms in the snippets are wrapped in ** for markdown.
+        """
+        if not self.pool:
+            return []
+
+        # Headlines re-parse the documents, so they are only built for the top `limit` matches
+        query = """
+        SELECT id, audio_filename, created_at, rank,
+            CASE WHEN transcription_tsv @@ q THEN ts_headline('english', transcription, q, %(options)s) END,
+            CASE WHEN analysis_tsv @@ q THEN ts_headline('english', analysis, q, %(options)s) END
+        FROM (
+            SELECT i.id, i.audio_filename, i.created_at, i.transcription, i.analysis,
+                i.transcription_tsv, i.analysis_tsv, q,
+                ts_rank_cd(i.transcription_tsv, q) + ts_rank_cd(i.analysis_tsv, q) AS rank
+            FROM interviews i, websearch_to_tsquery('english', %(text)s) q
+            WHERE i.transcription_tsv @@ q OR i.analysis_tsv @@ q
+            ORDER BY rank DESC, i.created_at DESC
+            LIMIT %(limit)s
+        ) AS matches
+        ORDER BY rank DESC, created_at DESC;
+        """
+        options = "StartSel=**, StopSel=**, MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter=\" … \""
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, {"text": text, "limit": limit, "options": options})
+                    return cur.fetchall()
+        except Exception as e:
+            print(f"Error searching interviews: {e}")
+            return []
+
+    def get_imported_hashes(self, audio_hashes):
+        """
+        Returns the subset of `audio_hashes` that a bulk import already finished.
+        """
+        if not self.pool:
+            return set()
+
+        query = "SELECT audio_hash FROM import_ledger WHERE status = 'done' AND audio_hash = ANY(%s);"
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (list(audio_hashes),))
+                    return {row[0] for row in cur.fetchall()}
+        except Exception as e:
+            print(f"Error reading import ledger: {e}")
+            return set()
+
+    def save_imported_interviews(self, rows, model):
+        """
+        Inserts a batch of fully processed interviews, with their first analysis version,
+        and marks them done in the import ledger, in a single transaction.
+        `rows` are (audio_hash, source_path, filename, prompt, transcription, analysis).
+        Returns the new interview ids, in order, or None if the batch could not be saved.
+        """
+        if not rows:
+            return []
+        if not self.pool:
+            return None
+
+        insert = """
+        INSERT INTO interviews (audio_filename, analysis_prompt, transcription, analysis)
+        VALUES %s
+        RETURNING id;
+        """
+        ledger = """
+        INSERT INTO import_ledger (audio_hash, source_path, status, interview_id, error)
+        VALUES %s
+        ON CONFLICT (audio_hash) DO UPDATE
+        SET source_path = EXCLUDED.source_path, status = EXCLUDED.status,
+            interview_id = EXCLUDED.interview_id, error = NULL, updated_at = CURRENT_TIMESTAMP;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    interview_ids = [
+                        row[0] for row in psycopg2.extras.execute_values(
+                            cur, insert, [row[2:] for row in rows], page_size=len(rows), fetch=True
+                        )
+                    ]
+                    psycopg2.extras.execute_values(
+                        cur,
+                        "INSERT INTO analyses (interview_id, prompt_hash, prompt, model, analysis) VALUES %s;",
+                        [(interview_id, prompt_hash(row[3]), row[3], model, row[5])
+                         for row, interview_id in zip(rows, interview_ids)],
+                    )
+                    psycopg2.extras.execute_values(
+                        cur, ledger,
+                        [(row[0], row[1], "done", interview_id, None) for row, interview_id in zip(rows, interview_ids)],
+                    )
+                conn.commit()
+            _invalidate_count_cache()
+            return interview_ids
+        except Exception as e:
+            print(f"Error saving imported interviews: {e}")
+            return None
+
+    def record_import_failures(self, failures):
+        """
+        Records (audio_hash, source_path, error) rows as failed so the next import retries them.
+        """
+        if not self.pool or not failures:
+            return
+
+        query = """
+        INSERT INTO import_ledger (audio_hash, source_path, status, error)
+        VALUES %s
+        ON CONFLICT (audio_hash) DO UPDATE
+        SET source_path = EXCLUDED.source_path, status = EXCLUDED.status,
+            error = EXCLUDED.error, updated_at = CURRENT_TIMESTAMP;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    psycopg2.extras.execute_values(
+                        cur, query, [(h, path, "failed", error) for h, path, error in failures]
+                    )
+                conn.commit()
+        except Exception as e:
+            print(f"Error recording import failures: {e}")
+
+    def save_preprocessing_report(self, audio_hash, report):
+        if not self.pool:
+            return
+
+        query = """
+        INSERT INTO audio_preprocessing
+            (audio_hash, original_bytes, processed_bytes, original_seconds, processed_seconds, timestamp_map)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (audio_hash) DO UPDATE
+        SET original_bytes = EXCLUDED.original_bytes, processed_bytes = EXCLUDED.processed_bytes,
+            original_seconds = EXCLUDED.original_seconds, processed_seconds = EXCLUDED.processed_seconds,
+            timestamp_map = EXCLUDED.timestamp_map, created_at = CURRENT_TIMESTAMP;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (
+                        audio_hash, report["original_bytes"], report["processed_bytes"],
+                        report["original_seconds"], report["processed_seconds"],
+                        psycopg2.extras.Json(report["timestamp_map"]),
+                    ))
+                conn.commit()
+        except Exception as e:
+            print(f"Error saving preprocessing report: {e}")
+
+    def get_preprocessing_totals(self):
+        """
+        Returns (files, original_bytes, processed_bytes, original_seconds, processed_seconds) over all recordings.
+        """
+        if not self.pool:
+            return None
+
+        query = """
+        SELECT count(*), coalesce(sum(original_bytes), 0)::bigint, coalesce(sum(processed_bytes), 0)::bigint,
+               coalesce(sum(original_seconds), 0), coalesce(sum(processed_seconds), 0)
+        FROM audio_preprocessing;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                    return cur.fetchone()
+        except Exception as e:
+            print(f"Error reading preprocessing totals: {e}")
+            return None
+
+    def get_cached_transcription(self, audio_hash):
+        if not self.pool:
+            return None
+
+        query = """
+        UPDATE transcription_cache
+        SET last_used_at = CURRENT_TIMESTAMP
+        WHERE audio_hash = %s
+        RETURNING transcription;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (audio_hash,))
+                    row = cur.fetchone()
+                conn.commit()
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Error reading transcription cache: {e}")
+            return None
+
+    def save_cached_transcription(self, audio_hash, text):
+        if not self.pool:
+            return
+
+        query = """
+        INSERT INTO transcription_cache (audio_hash, transcription)
+        VALUES (%s, %s)
+        ON CONFLICT (audio_hash) DO UPDATE
+        SET transcription = EXCLUDED.transcription, last_used_at = CURRENT_TIMESTAMP;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (audio_hash, text))
+                conn.commit()
+        except Exception as e:
+            print(f"Error writing transcription cache: {e}")
+
+    def evict_cached_transcriptions(self, max_age_days):
+        if not self.pool:
+            return 0
+
+        query = """
+        DELETE FROM transcription_cache
+        WHERE last_used_at < CURRENT_TIMESTAMP - make_interval(days => %s);
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (max_age_days,))
+                    evicted = cur.rowcount
+                conn.commit()
+            return evicted
+        except Exception as e:
+            print(f"Error evicting transcription cache: {e}")
+            return 0
+
+    def get_cached_analysis(self, cache_key):
+        if not self.pool:
+            return None
+
+        query = """
+        UPDATE analysis_cache
+        SET last_used_at = CURRENT_TIMESTAMP
+        WHERE cache_key = %s
+        RETURNING analysis;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (cache_key,))
+                    row = cur.fetchone()
+                conn.commit()
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Error reading analysis cache: {e}")
+            return None
+
+    def save_cached_analysis(self, cache_key, text, max_rows):
+        """
+        Stores an analysis and trims the cache to the `max_rows` most recently used entries.
+        """
+        if not self.pool:
+            return
+
+        upsert = """
+        INSERT INTO analysis_cache (cache_key, analysis)
+        VALUES (%s, %s)
+        ON CONFLICT (cache_key) DO UPDATE
+        SET analysis = EXCLUDED.analysis, last_used_at = CURRENT_TIMESTAMP;
+        """
+        evict = """
+        DELETE FROM analysis_cache
+        WHERE cache_key IN (
+            SELECT cache_key FROM analysis_cache
+            ORDER BY last_used_at DESC
+            OFFSET %s
+        );
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(upsert, (cache_key, text))
+                    cur.execute(evict, (max_rows,))
+                conn.commit()
+        except Exception as e:
+            print(f"Error writing analysis cache: {e}")
+
+    def delete_interview(self, interview_id, analysis_cache_keys=()):
+        """
+        Deletes an interview with its analysis versions, and in the same transaction the cached
+        transcription of its audio and the given analysis cache entries.
+        Returns the audio hashes whose cached transcription was deleted, or None on failure.
+        """
+        if not self.pool:
+            return None
+
+        # The cache is keyed by audio hash, which interviews don't keep; the transcript identifies it
+        purge_transcription = """
+        DELETE FROM transcription_cache
+        WHERE transcription = (SELECT transcription FROM interviews WHERE id = %s)
+        RETURNING audio_hash;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(purge_transcription, (interview_id,))
+                    audio_hashes = [row[0] for row in cur.fetchall()]
+                    if analysis_cache_keys:
+                        cur.execute("DELETE FROM analysis_cache WHERE cache_key = ANY(%s);", (list(analysis_cache_keys),))
+                    cur.execute("DELETE FROM analyses WHERE interview_id = %s;", (interview_id,))
+                    cur.execute("DELETE FROM interviews WHERE id = %s;", (interview_id,))
+                conn.commit()
+            _invalidate_count_cache()
+            return audio_hashes
         except Exception as e:
             print(f"Error deleting interview: {e}")
-            self.conn.rollback()
-            return False
+            return None
+
+    def save_metrics(self, trace_id, operation, interview_id, spans):
+        """
+        Writes the (stage, started_at, seconds, error, attributes) spans of one trace.
+        """
+        if not self.pool or not spans:
+            return
+
+        query = """
+        INSERT INTO pipeline_metrics
+            (trace_id, operation, stage, interview_id, started_at, duration_ms, error, attributes)
+        VALUES %s;
+        """
+        rows = [
+            (trace_id, operation, stage, interview_id, started_at, duration * 1000, error,
+             psycopg2.extras.Json(attributes))
+            for stage, started_at, duration, error, attributes in spans
+        ]
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    psycopg2.extras.execute_values(cur, query, rows, page_size=len(rows))
+                conn.commit()
+        except Exception as e:
+            print(f"Error saving metrics: {e}")
+
+    def create_interview_partitions(self):
+        """
+        Creates the coming months' partitions, and moves rows out of the default partition.
+        Runs at startup and periodically from the workers, so long-running processes never
+        outlive the partitions made when they started. Returns the partitions created.
+        """
+        if not self.pool:
+            return []
+
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_xact_lock(hashtext('jobby_schema'));")
+                    created = ensure_upcoming_interview_partitions(cur)
+                conn.commit()
+            return created
+        except Exception as e:
+            print(f"Error creating interview partitions: {e}")
+            return []
+
+    def evict_metrics(self, max_age_days):
+        if not self.pool:
+            return
+
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "DELETE FROM pipeline_metrics WHERE started_at < CURRENT_TIMESTAMP - make_interval(days => %s);",
+                        (max_age_days,),
+                    )
+                    cur.execute(
+                        "DELETE FROM request_profiles WHERE created_at < CURRENT_TIMESTAMP - make_interval(days => %s);",
+                        (max_age_days,),
+                    )
+                conn.commit()
+        except Exception as e:
+            print(f"Error evicting metrics: {e}")
+
+    def save_profile(self, trace_id, operation, samples, folded_stacks):
+        if not self.pool:
+            return
+
+        query = """
+        INSERT INTO request_profiles (trace_id, operation, samples, folded_stacks)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (trace_id) DO NOTHING;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (trace_id, operation, samples, folded_stacks))
+                conn.commit()
+        except Exception as e:
+            print(f"Error saving profile: {e}")
+
+    def get_stage_summary(self, hours):
+        """
+        Returns (stage, count, errors, p50_ms, p95_ms, p99_ms, input_tokens, output_tokens, audio_seconds)
+        per stage over the last `hours`.
+        """
+        if not self.pool:
+            return []
+
+        query = """
+        SELECT stage, count(*), count(error),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms),
+               percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms),
+               percentile_cont(0.99) WITHIN GROUP (ORDER BY duration_ms),
+               sum((attributes->>'input_tokens')::numeric),
+               sum((attributes->>'output_tokens')::numeric),
+               sum((attributes->>'audio_seconds')::numeric)
+        FROM pipeline_metrics
+        WHERE started_at > CURRENT_TIMESTAMP - make_interval(hours => %s)
+        GROUP BY stage
+        ORDER BY stage;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (hours,))
+                    return cur.fetchall()
+        except Exception as e:
+            print(f"Error reading stage summary: {e}")
+            return []
+
+    def get_stage_durations(self, stage, hours, limit=10000):
+        """
+        Returns the most recent durations (ms) of one stage, for histograms.
+        """
+        if not self.pool:
+            return []
+
+        query = """
+        SELECT duration_ms FROM pipeline_metrics
+        WHERE stage = %s AND started_at > CURRENT_TIMESTAMP - make_interval(hours => %s)
+        ORDER BY started_at DESC
+        LIMIT %s;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (stage, hours, limit))
+                    return [row[0] for row in cur.fetchall()]
+        except Exception as e:
+            print(f"Error reading stage durations: {e}")
+            return []
+
+    def get_recent_traces(self, limit=50):
+        """
+        Returns (trace_id, operation, interview_id, started_at, duration_ms, error, profiled) of the latest traces.
+        """
+        if not self.pool:
+            return []
+
+        query = """
+        SELECT m.trace_id, m.operation, m.interview_id, m.started_at, m.duration_ms, m.error,
+               p.trace_id IS NOT NULL
+        FROM pipeline_metrics m
+        LEFT JOIN request_profiles p ON p.trace_id = m.trace_id
+        WHERE m.stage = m.operation
+        ORDER BY m.started_at DESC
+        LIMIT %s;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (limit,))
+                    return cur.fetchall()
+        except Exception as e:
+            print(f"Error reading traces: {e}")
+            return []
+
+    def get_trace_spans(self, trace_id):
+        """
+        Returns (stage, started_at, duration_ms, error, attributes) for every span of a trace.
+        """
+        if not self.pool:
+            return []
+
+        query = """
+        SELECT stage, started_at, duration_ms, error, attributes
+        FROM pipeline_metrics
+        WHERE trace_id = %s
+        ORDER BY started_at, id;
+        """
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (trace_id,))
+                    return cur.fetchall()
+        except Exception as e:
+            print(f"Error reading trace: {e}")
+            return []
+
+    def get_profile(self, trace_id):
+        if not self.pool:
+            return None
+
+        query = "SELECT samples, folded_stacks FROM request_profiles WHERE trace_id = %s;"
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (trace_id,))
+                    return cur.fetchone()
+        except Exception as e:
+            print(f"Error reading profile: {e}")
+            return None
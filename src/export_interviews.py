@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import time
+from services.interview_export import FORMATS, export_file_name
+from services.interview_orchestrator import InterviewOrchestrator
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export every interview (transcripts and analyses) to a file.")
+    parser.add_argument("output", nargs="?", help="File to write, or - for stdout (default: interviews.<format>[.gz])")
+    parser.add_argument("--format", choices=list(FORMATS), default="ndjson", help="Output format (default: ndjson)")
+    parser.add_argument("--gzip", action="store_true", help="Gzip NDJSON or CSV output (Parquet is always compressed)")
+    parser.add_argument("--versions", action="store_true", help="Include every analysis version of each interview")
+    args = parser.parse_args()
+    if args.format == "parquet" and args.output == "-":
+        # The Parquet writer seeks back into the file, which a pipe can't do
+        parser.error("Parquet can't be written to stdout; give an output file instead of -")
+    return args
+
+
+def main():
+    args = parse_args()
+    output = args.output or export_file_name(args.format, args.gzip)
+    orchestrator = InterviewOrchestrator()
+
+    start = time.perf_counter()
+    if output == "-":
+        count = orchestrator.export_interviews(sys.stdout.buffer, args.format, args.gzip, args.versions)
+    else:
+        # Written next to the target and renamed, so an interrupted export never looks complete
+        partial = f"{output}.partial"
+        with open(partial, "wb") as out:
+            count = orchestrator.export_interviews(out, args.format, args.gzip, args.versions)
+        os.replace(partial, output)
+    print(f"Exported {count} interviews to {output} in {time.perf_counter() - start:.1f}s.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Synthetic recordings and Whisper segments are both ~8000 bytes per second of audio
+# (8-bit 8 kHz WAV, 64 kbit/s mp3); people speak ~150 words per minute.
+WORDS_PER_BYTE = 150 / 60 / 8000
+
+WORDS = (
+    "so I think the main thing I learned on that project was how to work with the team when "
+    "requirements kept changing we shipped every week and I owned the data pipeline end to end "
+    "which meant talking to customers a lot and fixing what broke in production"
+).split()
+
+
+def fake_transcript(word_count):
+    """
+    Speaker-labelled filler text, one turn every ~40 words.
+    """
+    lines, speakers = [], ("Interviewer", "Candidate")
+    for turn, start in enumerate(range(0, max(word_count, 1), 40)):
+        words = [random.choice(WORDS) for _ in range(min(40, word_count - start) or 1)]
+        lines.append(f"{speakers[turn % 2]}: {' '.join(words).capitalize()}.")
+    return "\n".join(lines)
+
+
+class RateWindow:
+    """
+    Sliding one-minute window of request timestamps; rpm <= 0 means unlimited.
+    """
+
+    def __init__(self, rpm):
+        self.rpm = rpm
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def admit(self):
+        """
+        Returns 0 if the request is admitted, else seconds until a slot frees up.
+        """
+        if self.rpm <= 0:
+            return 0
+        now = time.monotonic()
+        with self.lock:
+            while self.calls and now - self.calls[0] >= 60:
+                self.calls.popleft()
+            if len(self.calls) >= self.rpm:
+                return 60 - (now - self.calls[0])
+            self.calls.append(now)
+            return 0
+
+
+class FakeOpenAI:
+    """
+    Local stand-in for the Whisper and chat completion endpoints with configurable
+    latency and rate limits, so the pipeline can be load tested without an API key or costs.
+    """
+
+    def __init__(self, whisper_latency=1.0, whisper_latency_per_mb=0.5, chat_latency=0.5,
+                 token_latency=0.005, completion_tokens=400, whisper_rpm=0, chat_rpm=0, port=0):
+        self.whisper_latency = whisper_latency
+        self.whisper_latency_per_mb = whisper_latency_per_mb
+        self.chat_latency = chat_latency
+        self.token_latency = token_latency
+        self.completion_tokens = completion_tokens
+        self.limits = {"whisper": RateWindow(whisper_rpm), "chat": RateWindow(chat_rpm)}
+        self.stats = {"whisper": {"requests": 0, "rate_limited": 0},
+                      "chat": {"requests": 0, "rate_limited": 0, "prompt_tokens": 0}}
+        self.stats_lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_stats(self):
+        with self.stats_lock:
+            return json.loads(json.dumps(self.stats))
+
+    def _count(self, resource, field, amount=1):
+        with self.stats_lock:
+            self.stats[resource][field] += amount
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _rate_limited(self, resource):
+                wait = fake.limits[resource].admit()
+                fake._count(resource, "requests")
+                if not wait:
+                    return False
+                fake._count(resource, "rate_limited")
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached for requests", "type": "requests",
+                               "code": "rate_limit_exceeded"}},
+                    {"retry-after-ms": str(int(wait * 1000)), "x-ratelimit-reset-requests": f"{wait:.3f}s"},
+                )
+                return True
+
+            def do_GET(self):
+                if self.path == "/stats":
+                    self._send_json(200, fake.get_stats())
+                else:
+                    self._send_json(404, {"error": {"message": "Not found"}})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.endswith("/audio/transcriptions"):
+                    self._transcribe(body)
+                elif self.path.endswith("/chat/completions"):
+                    self._chat(json.loads(body))
+                else:
+                    self._send_json(404, {"error": {"message": "Not found"}})
+
+            def _transcribe(self, body):
+                if self._rate_limited("whisper"):
+                    return
+                time.sleep(fake.whisper_latency + len(body) / 1024 / 1024 * fake.whisper_latency_per_mb)
+                self._send_json(200, {"text": fake_transcript(int(len(body) * WORDS_PER_BYTE))})
+
+            def _chat(self, request):
+                if self._rate_limited("chat"):
+                    return
+                prompt_tokens = sum(len(m.get("content") or "") for m in request.get("messages", [])) // 4
+                fake._count("chat", "prompt_tokens", prompt_tokens)
+                words = fake_transcript(fake.completion_tokens).split(" ")
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+                model = request.get("model", "gpt-4o")
+
+                if not request.get("stream"):
+                    time.sleep(fake.chat_latency + len(words) * fake.token_latency)
+                    self._send_json(200, {
+                        "id": completion_id, "object": "chat.completion", "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": " ".join(words)}}],
+                        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                                  "total_tokens": prompt_tokens + len(words)},
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                time.sleep(fake.chat_latency)
+                for i, word in enumerate(words):
+                    delta = {"content": word if i == 0 else " " + word}
+                    if i == 0:
+                        delta["role"] = "assistant"
+                    self._send_chunk(completion_id, model, delta, None)
+                    time.sleep(fake.token_latency)
+                self._send_chunk(completion_id, model, {}, "stop")
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def _send_chunk(self, completion_id, model, delta, finish_reason):
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI API for local load testing.")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--whisper-latency", type=float, default=1.0, help="Seconds per transcription request")
+    parser.add_argument("--whisper-latency-per-mb", type=float, default=0.5, help="Extra seconds per MB uploaded")
+    parser.add_argument("--chat-latency", type=float, default=0.5, help="Seconds to the first token")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Seconds per generated token")
+    parser.add_argument("--completion-tokens", type=int, default=400, help="Tokens per completion")
+    parser.add_argument("--whisper-rpm", type=int, default=0, help="Whisper requests per minute (0: unlimited)")
+    parser.add_argument("--chat-rpm", type=int, default=0, help="Chat requests per minute (0: unlimited)")
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(args.whisper_latency, args.whisper_latency_per_mb, args.chat_latency, args.token_latency,
+                      args.completion_tokens, args.whisper_rpm, args.chat_rpm, args.port)
+    print(f"Fake OpenAI API listening on {fake.base_url} (set OPENAI_BASE_URL to use it)")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
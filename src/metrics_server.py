@@ -0,0 +1,39 @@
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from services.metrics import render_prometheus
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        try:
+            body = render_prometheus().encode()
+        except Exception as e:
+            print(f"Error rendering metrics: {e}")
+            self.send_error(503)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    """
+    Serves the pipeline metrics that every app and worker process records in Redis
+    at /metrics, for Prometheus to scrape.
+    """
+    port = int(os.getenv("METRICS_PORT", "9100"))
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    print(f"Serving metrics on :{port}/metrics")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import os
+import time
+from datetime import date
+
+import psycopg2
+import psycopg2.errors
+from database import (
+    INTERVIEW_COLUMNS, INTERVIEW_PARTITIONS_AHEAD, create_interviews_table, ensure_interview_partitions,
+    get_pool, interviews_partitioned, month_start,
+)
+
+NEW_TABLE = "interviews_partitioned"
+OLD_TABLE = "interviews_unpartitioned"
+DELETED_TABLE = "interviews_migration_deleted"
+
+# While the copy runs, every write to the old table is replayed onto the new one. Deleted ids are
+# also remembered: a copy batch reading an older snapshot could otherwise bring a deleted row back.
+MIRROR_TRIGGER = f"""
+CREATE TABLE IF NOT EXISTS {DELETED_TABLE} (id INTEGER PRIMARY KEY);
+
+CREATE OR REPLACE FUNCTION interviews_migration_mirror() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM {NEW_TABLE} WHERE id = OLD.id;
+        INSERT INTO {DELETED_TABLE} (id) VALUES (OLD.id) ON CONFLICT DO NOTHING;
+        RETURN OLD;
+    END IF;
+    INSERT INTO {NEW_TABLE} ({", ".join(INTERVIEW_COLUMNS)})
+    VALUES ({", ".join(f"NEW.{column}" for column in INTERVIEW_COLUMNS)})
+    ON CONFLICT (id, created_at) DO UPDATE
+    SET {", ".join(f"{column} = EXCLUDED.{column}" for column in INTERVIEW_COLUMNS[1:])};
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS interviews_migration_mirror ON interviews;
+CREATE TRIGGER interviews_migration_mirror
+AFTER INSERT OR UPDATE OR DELETE ON interviews
+FOR EACH ROW EXECUTE FUNCTION interviews_migration_mirror();
+"""
+
+# `|| ''` hands Postgres a fresh, uncompressed value, so it is compressed with the new column's
+# method instead of keeping the old one
+COPY_BATCH = f"""
+INSERT INTO {NEW_TABLE} ({", ".join(INTERVIEW_COLUMNS)})
+SELECT id, audio_filename, analysis_prompt, transcription || '', analysis || '', created_at, updated_at
+FROM interviews
+WHERE id > %s AND id <= %s
+ON CONFLICT DO NOTHING;
+"""
+
+
+# Adding a stored generated column rewrites the table, so both are added in one pass
+SEARCH_COLUMNS = """
+ALTER TABLE interviews
+    ADD COLUMN IF NOT EXISTS transcription_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(transcription, ''))) STORED,
+    ADD COLUMN IF NOT EXISTS analysis_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(analysis, ''))) STORED;
+"""
+SEARCH_INDEXES = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_interviews_transcription_tsv ON interviews USING gin (transcription_tsv);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_interviews_analysis_tsv ON interviews USING gin (analysis_tsv);",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manage the partitioned, compressed interviews table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="Convert a plain interviews table to the partitioned layout, online")
+    migrate.add_argument("--batch-size", type=int, default=500, help="Rows copied per transaction")
+    migrate.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    migrate.add_argument("--lock-timeout", type=int, default=5, help="Seconds to wait for the lock of the final swap")
+
+    archive = commands.add_parser("archive", help="Move old monthly partitions to an archive tablespace")
+    archive.add_argument("--tablespace", default=os.getenv("INTERVIEW_ARCHIVE_TABLESPACE"),
+                         help="Target tablespace (default: INTERVIEW_ARCHIVE_TABLESPACE)")
+    archive.add_argument("--older-than-months", type=int, default=int(os.getenv("INTERVIEW_ARCHIVE_AFTER_MONTHS", "12")),
+                         help="Archive partitions whose month ended this many months ago (default: 12)")
+
+    search = commands.add_parser(
+        "search-columns", help="Add the full-text search columns to a plain interviews table without converting it"
+    )
+    search.add_argument("--lock-timeout", type=int, default=5, help="Seconds to wait for the table lock")
+
+    commands.add_parser("status", help="List the interview partitions with their size and tablespace")
+    return parser.parse_args()
+
+
+def _rename_indexes(cur, table, old_prefix, new_prefix):
+    cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s AND indexname LIKE %s;",
+                (table, f"%{old_prefix}%"))
+    for (name,) in cur.fetchall():
+        cur.execute(f"ALTER INDEX {name} RENAME TO {name.replace(old_prefix, new_prefix, 1)};")
+
+
+def prepare(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('jobby_schema'));")
+        # The partition key can't be NULL; the column has always defaulted to the insert time
+        cur.execute("UPDATE interviews SET created_at = coalesce(updated_at, CURRENT_TIMESTAMP) "
+                    "WHERE created_at IS NULL;")
+        if interviews_partitioned(cur, NEW_TABLE):
+            print(f"Resuming: {NEW_TABLE} already exists.")
+        else:
+            create_interviews_table(cur, NEW_TABLE)
+            cur.execute("SAVEPOINT trigram;")
+            try:
+                cur.execute(f"CREATE INDEX idx_{NEW_TABLE}_filename_trgm ON {NEW_TABLE} "
+                            f"USING gin (audio_filename gin_trgm_ops);")
+            except psycopg2.Error:
+                cur.execute("ROLLBACK TO SAVEPOINT trigram;")
+        cur.execute("SELECT min(created_at) FROM interviews;")
+        oldest = cur.fetchone()[0] or date.today()
+        this_month = month_start(date.today())
+        created = ensure_interview_partitions(
+            cur, month_start(oldest), month_start(this_month, INTERVIEW_PARTITIONS_AHEAD), NEW_TABLE
+        )
+        print(f"Created {len(created)} monthly partitions.")
+        cur.execute(MIRROR_TRIGGER)
+        # Rows up to here are copied in batches; anything newer reaches the new table through the trigger
+        cur.execute("SELECT coalesce(max(id), 0) FROM interviews;")
+        last_id = cur.fetchone()[0]
+    conn.commit()
+    return last_id
+
+
+def copy_rows(conn, last_id, batch_size, pause):
+    copied_up_to = 0
+    start = time.perf_counter()
+    while copied_up_to < last_id:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT max(id) FROM (SELECT id FROM interviews WHERE id > %s AND id <= %s ORDER BY id LIMIT %s) b;",
+                (copied_up_to, last_id, batch_size),
+            )
+            upper = cur.fetchone()[0]
+            if upper is None:
+                break
+            cur.execute(COPY_BATCH, (copied_up_to, upper))
+        conn.commit()
+        copied_up_to = upper
+        print(f"Copied ids up to {copied_up_to} of {last_id} ({time.perf_counter() - start:.0f}s)")
+        if pause:
+            time.sleep(pause)
+    with conn.cursor() as cur:
+        cur.execute(f"ANALYZE {NEW_TABLE};")
+    conn.commit()
+
+
+def swap(conn, lock_timeout):
+    """
+    Replaces the old table with the new one in one short transaction. Returns False if the
+    lock could not be taken in time (nothing changed; run the command again).
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"SET LOCAL lock_timeout = '{lock_timeout}s';")
+        try:
+            cur.execute("LOCK TABLE interviews IN ACCESS EXCLUSIVE MODE;")
+        except psycopg2.errors.LockNotAvailable:
+            conn.rollback()
+            return False
+        cur.execute(f"DELETE FROM {NEW_TABLE} WHERE id IN (SELECT id FROM {DELETED_TABLE});")
+        cur.execute("DROP TRIGGER interviews_migration_mirror ON interviews;")
+        cur.execute("DROP FUNCTION interviews_migration_mirror();")
+        cur.execute(f"DROP TABLE {DELETED_TABLE};")
+
+        cur.execute(f"ALTER TABLE interviews RENAME TO {OLD_TABLE};")
+        cur.execute(f"ALTER TABLE {OLD_TABLE} ALTER COLUMN id DROP DEFAULT;")
+        _rename_indexes(cur, OLD_TABLE, "interviews", OLD_TABLE)
+        cur.execute(f"ALTER TABLE {NEW_TABLE} RENAME TO interviews;")
+        _rename_indexes(cur, "interviews", NEW_TABLE, "interviews")
+        cur.execute("ALTER SEQUENCE interviews_id_seq OWNED BY interviews.id;")
+    conn.commit()
+    return True
+
+
+def migrate(pool, args):
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            if interviews_partitioned(cur):
+                print("The interviews table is already partitioned.")
+                return
+        last_id = prepare(conn)
+        copy_rows(conn, last_id, args.batch_size, args.pause)
+        while not swap(conn, args.lock_timeout):
+            print("Waiting for the interviews table to be free for the swap...")
+            time.sleep(1)
+    print(f"Done. The old table is kept as {OLD_TABLE}; drop it once you've checked the result.")
+
+
+def archive(pool, args):
+    if not args.tablespace:
+        raise SystemExit("No archive tablespace given (--tablespace or INTERVIEW_ARCHIVE_TABLESPACE).")
+    cutoff = month_start(date.today(), -args.older_than_months)
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                LEFT JOIN pg_tablespace t ON t.oid = c.reltablespace
+                WHERE i.inhparent = 'interviews'::regclass AND c.relname ~ '^interviews_y[0-9]{4}m[0-9]{2}$'
+                    AND coalesce(t.spcname, '') <> %s
+                ORDER BY c.relname;
+                """,
+                (args.tablespace,),
+            )
+            partitions = [row[0] for row in cur.fetchall()]
+        conn.commit()
+
+        for name in partitions:
+            year, month = int(name[12:16]), int(name[17:19])
+            if month_start(date(year, month, 1), 1) > cutoff:
+                continue
+            # Rewrites one month at a time; only that month is locked while it moves
+            start = time.perf_counter()
+            with conn.cursor() as cur:
+                cur.execute(f"ALTER TABLE {name} SET TABLESPACE {args.tablespace};")
+                cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s;", (name,))
+                for (index,) in cur.fetchall():
+                    cur.execute(f"ALTER INDEX {index} SET TABLESPACE {args.tablespace};")
+            conn.commit()
+            print(f"Moved {name} to {args.tablespace} in {time.perf_counter() - start:.1f}s")
+
+
+def add_search_columns(pool, args):
+    """
+    Adds the generated tsvector columns to a plain interviews table, then indexes them without
+    blocking writes. The column rewrite holds an exclusive lock on the table while it runs, so
+    schedule it for a quiet time (or convert the table with the migrate command instead).
+    """
+    with pool.connection() as conn:
+        start = time.perf_counter()
+        with conn.cursor() as cur:
+            cur.execute(f"SET LOCAL lock_timeout = '{args.lock_timeout}s';")
+            try:
+                cur.execute(SEARCH_COLUMNS)
+            except psycopg2.errors.LockNotAvailable:
+                conn.rollback()
+                raise SystemExit("The interviews table is busy; run the command again.")
+        conn.commit()
+        print(f"Added the search columns in {time.perf_counter() - start:.1f}s.")
+
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                for index in SEARCH_INDEXES:
+                    cur.execute(index)
+        finally:
+            conn.autocommit = False
+    print("Full-text search is ready.")
+
+
+def status(pool):
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT c.relname, coalesce(t.spcname, 'default'), greatest(c.reltuples, 0)::bigint,
+                    pg_size_pretty(pg_table_size(c.oid)), pg_size_pretty(pg_indexes_size(c.oid))
+                FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                LEFT JOIN pg_tablespace t ON t.oid = c.reltablespace
+                WHERE i.inhparent = 'interviews'::regclass
+                ORDER BY c.relname;
+                """
+            )
+            rows = cur.fetchall()
+    if not rows:
+        print("The interviews table is not partitioned; run the migrate command.")
+    for name, tablespace, row_estimate, table_size, index_size in rows:
+        print(f"{name:<22} {tablespace:<12} ~{row_estimate:>8} rows  table {table_size:>10}  indexes {index_size:>10}")
+
+
+def main():
+    args = parse_args()
+    pool = get_pool()
+    if not pool:
+        raise SystemExit("Database is not available.")
+    if args.command == "migrate":
+        migrate(pool, args)
+    elif args.command == "archive":
+        archive(pool, args)
+    elif args.command == "search-columns":
+        add_search_columns(pool, args)
+    else:
+        status(pool)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import time
+import streamlit as st
+from app_resources import get_orchestrator, record_first_render
+from services.metrics import BUCKETS, get_http_counts
+from auth import require_auth
+
+WINDOWS = {"Last hour": 1, "Last 24 hours": 24, "Last 7 days": 24 * 7, "Last 30 days": 24 * 30}
+
+render_started = time.perf_counter()
+st.set_page_config(page_title="Jobby - Pipeline Metrics", page_icon="📈", layout="wide")
+
+# Hide sidebar if not logged in
+if not st.session_state.get("password_correct", False):
+    st.markdown("""
+    <style>
+        [data-testid="stSidebarNav"] {display: none;}
+    </style>
+    """, unsafe_allow_html=True)
+
+require_auth()
+st.title("📈 Pipeline Metrics")
+
+orchestrator = get_orchestrator()
+
+
+def format_ms(value):
+    return None if value is None else round(float(value), 1)
+
+
+def bucket_label(seconds):
+    return f"{seconds * 1000:g} ms" if seconds < 1 else f"{seconds:g} s"
+
+
+preprocessing = orchestrator.get_preprocessing_totals()
+if preprocessing and preprocessing[0]:
+    files, original_bytes, processed_bytes, original_seconds, processed_seconds = preprocessing
+    files_col, bytes_col, time_col = st.columns(3)
+    files_col.metric("Preprocessed recordings", files)
+    bytes_col.metric("Upload size saved", f"{(original_bytes - processed_bytes) / 1e6:,.0f} MB",
+                     f"-{(1 - processed_bytes / original_bytes) * 100:.0f}%" if original_bytes else None,
+                     delta_color="off")
+    time_col.metric("Audio time saved", f"{(original_seconds - processed_seconds) / 60:,.0f} min",
+                    f"-{(1 - processed_seconds / original_seconds) * 100:.0f}%" if original_seconds else None,
+                    delta_color="off")
+
+http_requests, http_connections = get_http_counts()
+if http_requests:
+    requests_col, connections_col, _ = st.columns(3)
+    requests_col.metric("OpenAI HTTP requests", f"{http_requests:,}")
+    connections_col.metric("Connections opened", f"{http_connections:,}",
+                           f"{(1 - http_connections / http_requests) * 100:.0f}% reused", delta_color="off")
+
+transcription_cache = orchestrator.get_transcription_cache_stats()
+analysis_cache = orchestrator.get_analysis_cache_stats()
+if any(transcription_cache.values()) or any(analysis_cache.values()):
+    transcription_col, analysis_col, _ = st.columns(3)
+    transcription_col.metric(
+        "Transcription cache hit rate", f"{transcription_cache['hit_rate'] * 100:.0f}%",
+        f"{transcription_cache['redis_hits']:,} Redis / {transcription_cache['db_hits']:,} DB / "
+        f"{transcription_cache['misses']:,} misses",
+        delta_color="off",
+    )
+    analysis_col.metric(
+        "Analysis cache hit rate", f"{analysis_cache['hit_rate'] * 100:.0f}%",
+        f"{analysis_cache['memory_hits']:,} memory / {analysis_cache['db_hits']:,} DB / "
+        f"{analysis_cache['misses']:,} misses",
+        delta_color="off",
+    )
+
+hours = WINDOWS[st.selectbox("Window", list(WINDOWS), index=1)]
+summary = orchestrator.get_stage_summary(hours)
+if not summary:
+    st.info("No requests were recorded in this window.")
+    record_first_render("metrics", render_started)
+    st.stop()
+
+st.subheader("Stages")
+st.dataframe(
+    [
+        {
+            "stage": stage,
+            "count": count,
+            "errors": errors,
+            "p50 ms": format_ms(p50),
+            "p95 ms": format_ms(p95),
+            "p99 ms": format_ms(p99),
+            "input tokens": int(input_tokens or 0),
+            "output tokens": int(output_tokens or 0),
+            "audio min": round(float(audio_seconds or 0) / 60, 1),
+        }
+        for stage, count, errors, p50, p95, p99, input_tokens, output_tokens, audio_seconds in summary
+    ],
+    use_container_width=True,
+    hide_index=True,
+)
+
+st.subheader("Latency histogram")
+stages = [row[0] for row in summary]
+default_stage = stages.index("process_interview") if "process_interview" in stages else 0
+stage = st.selectbox("Stage", stages, index=default_stage)
+durations = orchestrator.get_stage_durations(stage, hours)
+counts = [0] * (len(BUCKETS) + 1)
+for duration_ms in durations:
+    index = next((i for i, bucket in enumerate(BUCKETS) if duration_ms <= bucket * 1000), len(BUCKETS))
+    counts[index] += 1
+# Numbered labels keep the buckets in order on the chart's axis
+labels = [f"{i:02d}: ≤ {bucket_label(bucket)}" for i, bucket in enumerate(BUCKETS)]
+labels.append(f"{len(BUCKETS):02d}: > {bucket_label(BUCKETS[-1])}")
+st.bar_chart({"bucket": labels, "requests": counts}, x="bucket", y="requests")
+st.caption(f"Latest {len(durations)} `{stage}` spans.")
+
+st.subheader("Recent requests")
+st.caption("Append `?profile=1` to the analyzer page URL (or set PROFILE_SAMPLE_RATE) to record "
+           "a sampling profile of requests; profiled requests can be downloaded as folded stacks below.")
+traces = orchestrator.get_recent_traces()
+trace_labels = {
+    f"{started_at:%Y-%m-%d %H:%M:%S} · {operation} · {duration_ms / 1000:.1f}s"
+    + (f" · interview {interview_id}" if interview_id else "")
+    + (" · ❌" if error else "")
+    + (" · 🔬" if profiled else ""): trace_id
+    for trace_id, operation, interview_id, started_at, duration_ms, error, profiled in traces
+}
+selected = st.selectbox("Request", list(trace_labels), index=None, placeholder="Choose a request...")
+if selected:
+    trace_id = trace_labels[selected]
+    spans = orchestrator.get_trace_spans(trace_id)
+    trace_start = spans[0][1] if spans else None
+    st.dataframe(
+        [
+            {
+                "stage": span_stage,
+                "start +ms": round((started_at - trace_start).total_seconds() * 1000, 1),
+                "duration ms": format_ms(duration_ms),
+                "error": error,
+                "details": attributes,
+            }
+            for span_stage, started_at, duration_ms, error, attributes in spans
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
+    profile = orchestrator.get_profile(trace_id)
+    if profile:
+        samples, folded_stacks = profile
+        st.download_button(
+            f"Download profile ({samples} samples)",
+            folded_stacks,
+            file_name=f"{trace_id}.folded",
+            help="Folded stacks; open with speedscope or flamegraph.pl",
+        )
+
+record_first_render("metrics", render_started)
@@ -0,0 +1,24 @@
+import os
+import threading
+import redis
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_redis(decode_responses=True):
+    """
+    Returns a Redis client backed by a process-wide connection pool.
+    Clients are cheap; the underlying sockets are shared by every caller in the process.
+    """
+    with _pools_lock:
+        pool = _pools.get(decode_responses)
+        if pool is None:
+            pool = redis.ConnectionPool(
+                host=os.environ.get("REDIS_HOST", "localhost"),
+                port=int(os.environ.get("REDIS_PORT", "6379")),
+                db=int(os.environ.get("REDIS_DB", "0")),
+                decode_responses=decode_responses,
+            )
+            _pools[decode_responses] = pool
+    return redis.Redis(connection_pool=pool)
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import redis
+from redis_client import get_redis
+
+
+class LRUCache:
+    """
+    Small thread-safe, size-bounded LRU map.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def analysis_cache_key(transcription, prompt, model, temperature):
+    """
+    Hash of everything that determines the model's output.
+    """
+    digest = hashlib.sha256()
+    for part in (model, repr(float(temperature)), prompt, transcription):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# Shared by every orchestrator in the process, so it survives Streamlit reruns
+_memory_tier = LRUCache(int(os.getenv("ANALYSIS_CACHE_LRU_SIZE", "128")))
+
+
+class AnalysisCache:
+    """
+    Memoizes analysis results: an in-process LRU in front of the
+    Postgres analysis_cache table, which is trimmed to ANALYSIS_CACHE_MAX_ROWS.
+    Hit/miss counters live in Redis so every app and worker process reports the same numbers.
+    """
+
+    stats_key = "analysis_cache:stats"
+
+    def __init__(self, db):
+        self.db = db
+        self.r = get_redis()
+        self.memory = _memory_tier
+        self.max_rows = int(os.getenv("ANALYSIS_CACHE_MAX_ROWS", "5000"))
+
+    def _count(self, field):
+        try:
+            self.r.hincrby(self.stats_key, field, 1)
+        except redis.RedisError:
+            pass
+
+    def get(self, key):
+        text = self.memory.get(key)
+        if text is not None:
+            self._count("memory_hits")
+            return text
+
+        text = self.db.get_cached_analysis(key)
+        if text is None:
+            self._count("misses")
+            return None
+
+        self._count("db_hits")
+        self.memory.put(key, text)
+        return text
+
+    def put(self, key, text):
+        self.memory.put(key, text)
+        self.db.save_cached_analysis(key, text, self.max_rows)
+
+    def forget(self, keys):
+        """
+        Drops entries from this process's memory tier (their rows are deleted with the interview).
+        Other processes' LRUs keep them until they are evicted.
+        """
+        for key in keys:
+            self.memory.discard(key)
+
+    def stats(self):
+        try:
+            raw = self.r.hgetall(self.stats_key)
+        except redis.RedisError:
+            raw = {}
+        stats = {field: int(raw.get(field, 0)) for field in ("memory_hits", "db_hits", "misses")}
+        total = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["db_hits"]) / total if total else 0.0
+        stats["memory_entries"] = len(self.memory)
+        return stats
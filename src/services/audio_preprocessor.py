@@ -0,0 +1,176 @@
+import bisect
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from services import metrics
+from services.audio_segmenter import detect_silences, probe_duration
+from services.audio_upload import UPLOAD_DIR, AudioUpload
+
+PREPROCESS_ENABLED = os.getenv("AUDIO_PREPROCESS", "1") == "1"
+PREPROCESS_WORKERS = int(os.getenv("AUDIO_PREPROCESS_WORKERS", "2"))
+PREPROCESS_MIN_BYTES = int(float(os.getenv("AUDIO_PREPROCESS_MIN_MB", "1")) * 1024 * 1024)
+# Whisper works on 16 kHz mono internally; Opus at this bitrate is transparent for speech
+SAMPLE_RATE = 16000
+BITRATE = os.getenv("AUDIO_PREPROCESS_BITRATE", "24k")
+# Silences longer than MIN_SILENCE are shortened to KEEP_SILENCE, so pauses still separate sentences
+MIN_SILENCE_SECONDS = float(os.getenv("AUDIO_PREPROCESS_MIN_SILENCE", "1.0"))
+KEEP_SILENCE_SECONDS = 0.3
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def keep_intervals(duration, silences, min_silence=MIN_SILENCE_SECONDS, keep_silence=KEEP_SILENCE_SECONDS):
+    """
+    Returns the (start, end) stretches of the original audio to keep, with every
+    silence longer than `min_silence` shortened to `keep_silence`.
+    """
+    intervals = []
+    start = 0.0
+    for silence_start, silence_end in silences:
+        if silence_end - silence_start < min_silence:
+            continue
+        cut_start = silence_start + keep_silence / 2
+        cut_end = silence_end - keep_silence / 2
+        if cut_start > start:
+            intervals.append((start, cut_start))
+        start = max(start, cut_end)
+    if start < duration:
+        intervals.append((start, duration))
+    return intervals
+
+
+def build_timestamp_map(intervals):
+    """
+    Maps the processed audio back onto the original: [(processed_start, original_start, original_end)].
+    """
+    timestamp_map = []
+    processed = 0.0
+    for start, end in intervals:
+        timestamp_map.append((processed, start, end))
+        processed += end - start
+    return timestamp_map
+
+
+def to_original_time(timestamp_map, seconds):
+    """
+    Converts a time in the processed audio (e.g. a segment offset) to the original recording.
+    """
+    if not timestamp_map:
+        return seconds
+    index = max(0, bisect.bisect_right([entry[0] for entry in timestamp_map], seconds) - 1)
+    processed_start, original_start, original_end = timestamp_map[index]
+    return min(original_end, original_start + max(0.0, seconds - processed_start))
+
+
+def preprocess_file(input_path, output_path):
+    """
+    Extracts the audio track, downmixes to mono, resamples to SAMPLE_RATE, shortens long
+    silences and encodes to Opus. Runs in a pool process; returns a picklable report.
+    """
+    start = time.perf_counter()
+    original_seconds = probe_duration(input_path)
+    if original_seconds is None:
+        raise ValueError("ffprobe could not read the recording")
+
+    intervals = keep_intervals(original_seconds, detect_silences(input_path))
+    filters = []
+    if intervals and intervals != [(0.0, original_seconds)]:
+        selection = "+".join(f"between(t,{s:.3f},{e:.3f})" for s, e in intervals)
+        filters = ["-af", f"aselect='{selection}',asetpts=N/SR/TB"]
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", input_path, "-vn", *filters,
+         "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "libopus", "-b:a", BITRATE, "-application", "voip",
+         output_path],
+        capture_output=True, check=True,
+    )
+    return {
+        "original_bytes": os.path.getsize(input_path),
+        "processed_bytes": os.path.getsize(output_path),
+        "original_seconds": original_seconds,
+        "processed_seconds": sum(e - s for s, e in intervals) if intervals else original_seconds,
+        "timestamp_map": build_timestamp_map(intervals),
+        "elapsed_seconds": time.perf_counter() - start,
+    }
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned, not forked: the app process is full of threads
+            _executor = ProcessPoolExecutor(
+                max_workers=PREPROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _executor
+
+
+class PreprocessedAudio:
+    def __init__(self, upload, report):
+        self.upload = upload
+        self.report = report
+
+    def cleanup(self):
+        if self.upload.path and os.path.exists(self.upload.path):
+            os.remove(self.upload.path)
+
+
+class AudioPreprocessor:
+    """
+    Shrinks recordings before they are sent to Whisper. The ffmpeg work and its
+    bookkeeping run in a process pool, off the Streamlit process's GIL; worker
+    processes (which may not have children) run it inline.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.enabled = PREPROCESS_ENABLED
+
+    def _run(self, input_path, output_path):
+        if multiprocessing.current_process().daemon:
+            return preprocess_file(input_path, output_path)
+        return _get_executor().submit(preprocess_file, input_path, output_path).result()
+
+    def prepare(self, upload, audio_hash=None):
+        """
+        Returns a PreprocessedAudio to transcribe instead of `upload`, or None if the
+        recording is too small to bother, can't be read, or wouldn't get smaller.
+        Uploads held in memory are spilled once for ffmpeg, which reads the recording in several passes;
+        the spilled file belongs to `upload` and goes with its cleanup().
+        """
+        if not self.enabled or upload.size < PREPROCESS_MIN_BYTES:
+            return None
+
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        output = tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix="preprocessed_", suffix=".ogg", delete=False)
+        output.close()
+        with metrics.span("preprocess_audio") as attributes:
+            try:
+                report = self._run(upload.local_path(), output.name)
+            except (OSError, ValueError, subprocess.CalledProcessError) as e:
+                print(f"Audio preprocessing failed for {upload.file_name}, sending it as is: {e}")
+                attributes["used"] = False
+                os.remove(output.name)
+                return None
+            attributes.update(
+                bytes=report["processed_bytes"],
+                bytes_saved=report["original_bytes"] - report["processed_bytes"],
+                audio_seconds=report["processed_seconds"],
+                seconds_saved=report["original_seconds"] - report["processed_seconds"],
+                # Excludes the wait for a free pool process
+                ffmpeg_seconds=report["elapsed_seconds"],
+                used=report["processed_bytes"] < report["original_bytes"],
+            )
+
+        if not attributes["used"]:
+            os.remove(output.name)
+            return None
+
+        if audio_hash:
+            self.db.save_preprocessing_report(audio_hash, report)
+        stem, _ = os.path.splitext(upload.file_name)
+        return PreprocessedAudio(AudioUpload(f"{stem}.ogg", path=output.name), report)
@@ -0,0 +1,109 @@
+import re
+import subprocess
+
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_SECONDS = 0.4
+
+
+def probe_duration(source):
+    """
+    Returns the duration of a media file in seconds, or None if ffprobe can't read it.
+    `source` is a file path, or an in-memory buffer that is piped to ffprobe.
+    """
+    is_path = isinstance(source, str)
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", source if is_path else "pipe:0"],
+            input=None if is_path else source,
+            capture_output=True, check=True,
+        )
+        return float(result.stdout.decode().strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def detect_silences(file_path):
+    """
+    Returns a list of (start, end) silence intervals in seconds using ffmpeg's silencedetect filter.
+    ffmpeg streams the file, so memory stays flat regardless of the recording length.
+    """
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-nostats", "-i", file_path, "-vn",
+             "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+             "-f", "null", "-"],
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return []
+
+    starts = [float(s) for s in re.findall(r"silence_start: (-?[\d.]+)", result.stderr)]
+    ends = [float(e) for e in re.findall(r"silence_end: ([\d.]+)", result.stderr)]
+    return list(zip(starts, ends))
+
+
+def plan_segments(duration, silences, chunk_seconds, overlap_seconds):
+    """
+    Splits [0, duration] into (start, end) segments of roughly `chunk_seconds`.
+    Each cut is moved back to the last silence in the final 20% of the chunk when there is one,
+    and every segment runs `overlap_seconds` past its cut so no word is lost at the seam.
+    """
+    search_seconds = chunk_seconds * 0.2
+    segments = []
+    start = 0.0
+    while start < duration:
+        target = start + chunk_seconds
+        if target >= duration - overlap_seconds:
+            segments.append((start, duration))
+            break
+
+        midpoints = [(s + e) / 2 for s, e in silences if target - search_seconds <= (s + e) / 2 <= target]
+        cut = max(midpoints) if midpoints else target
+        segments.append((start, min(duration, cut + overlap_seconds)))
+        start = cut
+    return segments
+
+
+def extract_segment(file_path, start, end, bitrate="64k"):
+    """
+    Returns the [start, end) slice of the file as mono mp3 bytes, ready to upload.
+    """
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error",
+         "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", file_path,
+         "-vn", "-ac", "1", "-ar", "16000", "-c:a", "libmp3lame", "-b:a", bitrate,
+         "-f", "mp3", "pipe:1"],
+        capture_output=True, check=True,
+    )
+    return result.stdout
+
+
+def _normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _overlap_length(previous, following, min_match=2):
+    """
+    Length of the longest run of words that ends `previous` and starts `following`.
+    """
+    for k in range(min(len(previous), len(following)), min_match - 1, -1):
+        if previous[-k:] == following[:k]:
+            return k
+    return 0
+
+
+def merge_transcripts(texts, max_overlap_words=40):
+    """
+    Joins per-segment transcripts in order, dropping the words repeated in each overlap.
+    """
+    merged = []
+    for text in texts:
+        words = text.split()
+        if not merged:
+            merged.extend(words)
+            continue
+        previous = [_normalize_word(w) for w in merged[-max_overlap_words:]]
+        following = [_normalize_word(w) for w in words[:max_overlap_words]]
+        merged.extend(words[_overlap_length(previous, following):])
+    return " ".join(merged)
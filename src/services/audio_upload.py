@@ -0,0 +1,126 @@
+import io
+import os
+import resource
+import tempfile
+import threading
+from services import metrics
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "jobby_uploads"))
+UPLOAD_MEMORY_LIMIT_BYTES = int(float(os.getenv("UPLOAD_MEMORY_LIMIT_MB", "16")) * 1024 * 1024)
+SPILL_BLOCK_SIZE = 1024 * 1024
+
+_stats = {"uploads": 0, "in_memory": 0, "spilled": 0, "bytes_received": 0, "bytes_written": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(**increments):
+    with _stats_lock:
+        for field, value in increments.items():
+            _stats[field] += value
+
+
+def get_upload_stats():
+    """
+    Process-wide upload counters, plus the process's peak resident memory.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    # ru_maxrss is reported in kilobytes on Linux
+    stats["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return stats
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over a memoryview. HTTP clients read it
+    in chunks, so the upload buffer is never copied as a whole.
+    """
+
+    def __init__(self, buffer, name):
+        super().__init__()
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._view) + offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+class AudioUpload:
+    """
+    An uploaded recording. Small uploads stay in memory and are handed to the
+    transcription client as-is; large ones (or ones ffmpeg needs to seek through)
+    are spilled to a uniquely named file in UPLOAD_DIR.
+    """
+
+    def __init__(self, file_name, buffer=None, path=None):
+        self.file_name = os.path.basename(file_name)
+        self.buffer = buffer
+        self.path = path
+        self._owns_path = False
+
+    @classmethod
+    def from_buffer(cls, file_name, buffer, memory_limit=UPLOAD_MEMORY_LIMIT_BYTES):
+        upload = cls(file_name, buffer=buffer)
+        _count(uploads=1, bytes_received=upload.size)
+        if upload.size > memory_limit:
+            upload.local_path()
+        else:
+            _count(in_memory=1)
+        return upload
+
+    @property
+    def size(self):
+        if self.buffer is not None:
+            return memoryview(self.buffer).nbytes
+        return os.path.getsize(self.path)
+
+    def open(self):
+        if self.path is not None:
+            return open(self.path, "rb")
+        return BufferReader(self.buffer, self.file_name)
+
+    def local_path(self):
+        """
+        Returns a path to the recording on disk, spilling the buffer to UPLOAD_DIR if needed.
+        """
+        if self.path is not None:
+            return self.path
+
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        _, extension = os.path.splitext(self.file_name)
+        view = memoryview(self.buffer).cast("B")
+        with metrics.span("write_temp_file", bytes=len(view)):
+            with tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix="upload_", suffix=extension, delete=False) as f:
+                for offset in range(0, len(view), SPILL_BLOCK_SIZE):
+                    f.write(view[offset:offset + SPILL_BLOCK_SIZE])
+                self.path = f.name
+        self._owns_path = True
+        self.buffer = None
+        _count(spilled=1, bytes_written=len(view))
+        return self.path
+
+    def cleanup(self):
+        if self._owns_path and self.path and os.path.exists(self.path):
+            os.remove(self.path)
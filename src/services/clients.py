@@ -0,0 +1,138 @@
+import os
+import sys
+import threading
+import time
+from services import metrics
+
+# Keep-alive pool shared by the Whisper client and every chat model in the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "120"))
+
+_clients = {}
+_lock = threading.RLock()
+
+
+def _import_llm_stack():
+    """
+    Imports openai and langchain on first use rather than when a page loads, and records
+    how long it took. Browsing interviews never gets here.
+    """
+    if "langchain_openai" in sys.modules:
+        return
+    with _lock:
+        if "langchain_openai" in sys.modules:
+            return
+        start = time.perf_counter()
+        import openai  # noqa: F401
+        import langchain.schema  # noqa: F401
+        import langchain_openai  # noqa: F401
+        metrics.record_timing("import_llm_stack", time.perf_counter() - start)
+
+
+def _get(key, build):
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        if key not in _clients:
+            start = time.perf_counter()
+            _clients[key] = build()
+            metrics.record_timing("build_client", time.perf_counter() - start, client=key[0])
+        return _clients[key]
+
+
+def _trace_connection(event, info):
+    # httpcore reports every new connection; requests on a kept-alive one skip this
+    if event == "connection.connect_tcp.complete":
+        metrics.count_http("connections")
+
+
+def _on_request(request):
+    request.extensions["trace"] = _trace_connection
+    metrics.count_http("requests")
+
+
+def http_client():
+    """
+    The process-wide keep-alive HTTP pool for OpenAI calls.
+    """
+    def build():
+        import httpx
+
+        return httpx.Client(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_SECONDS,
+            ),
+            event_hooks={"request": [_on_request]},
+        )
+
+    return _get(("http",), build)
+
+
+def openai_client():
+    """
+    The process-wide OpenAI client (used for Whisper). Retries are left to the rate governor.
+    """
+    def build():
+        _import_llm_stack()
+        from openai import OpenAI
+
+        return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0, http_client=http_client())
+
+    return _get(("openai",), build)
+
+
+def new_chat_model(model, temperature):
+    """
+    A chat model on the shared HTTP pool. Use this for async calls: an async HTTP pool is tied to
+    the event loop it was used on, and every fan-out runs on a fresh one.
+    """
+    _import_llm_stack()
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=0,
+        # Report token usage on the last chunk of streamed responses too
+        stream_usage=True,
+        http_client=http_client(),
+    )
+
+
+def chat_model(model, temperature):
+    """
+    The process-wide chat model for `model` and `temperature`, for sync and streaming calls.
+    """
+    return _get(("chat", model, temperature), lambda: new_chat_model(model, temperature))
+
+
+def message_types():
+    """
+    Returns langchain's (SystemMessage, HumanMessage).
+    """
+    _import_llm_stack()
+    from langchain.schema import HumanMessage, SystemMessage
+
+    return SystemMessage, HumanMessage
+
+
+def encoding(name):
+    def build():
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+
+    return _get(("encoding", name), build)
+
+
+def warm(analysis_model, temperature):
+    """
+    Builds the clients ahead of the first request (worker processes call this at startup).
+    """
+    openai_client()
+    chat_model(analysis_model, temperature)
+    encoding("o200k_base")
@@ -0,0 +1,136 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+
+# Columns of Database.iter_export_batches, in order
+COLUMNS = (
+    "id", "audio_filename", "created_at", "updated_at",
+    "analysis_prompt", "transcription", "analysis", "analyses",
+)
+FORMATS = {"ndjson": ".ndjson", "csv": ".csv", "parquet": ".parquet"}
+
+# Exports prepared for download in the app; files older than EXPORT_TTL_SECONDS were left by interrupted runs
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "jobby_exports"))
+EXPORT_TTL_SECONDS = int(os.getenv("EXPORT_TTL_SECONDS", "3600"))
+
+
+def export_file_name(fmt, compress):
+    """
+    Default file name for an export: interviews.ndjson.gz, interviews.parquet, ...
+    """
+    # Parquet compresses its column chunks itself
+    suffix = ".gz" if compress and fmt != "parquet" else ""
+    return f"interviews{FORMATS[fmt]}{suffix}"
+
+
+def remove_stale_exports(max_age=EXPORT_TTL_SECONDS):
+    """
+    Deletes files in EXPORT_DIR older than `max_age` seconds. Returns how many were removed.
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = os.scandir(EXPORT_DIR)
+    except FileNotFoundError:
+        return 0
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                # Removed by another process in the meantime
+                pass
+    return removed
+
+
+def new_export_file():
+    """
+    Opens a new, uniquely named file in EXPORT_DIR to write an export to; the caller deletes it.
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    remove_stale_exports()
+    return tempfile.NamedTemporaryFile(dir=EXPORT_DIR, prefix="export_", delete=False)
+
+
+def _json_default(value):
+    # created_at / updated_at
+    return value.isoformat()
+
+
+def _write_ndjson(batches, out):
+    count = 0
+    for rows in batches:
+        lines = [json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False, default=_json_default) for row in rows]
+        out.write(("\n".join(lines) + "\n").encode())
+        count += len(rows)
+    return count
+
+
+def _write_csv(batches, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(COLUMNS)
+    count = 0
+    for rows in batches:
+        writer.writerows(
+            [*row[:-1], None if row[-1] is None else json.dumps(row[-1], ensure_ascii=False)] for row in rows
+        )
+        count += len(rows)
+    # Hand `out` back to the caller instead of closing it with the wrapper
+    text.detach()
+    return count
+
+
+def _write_parquet(batches, out):
+    # pyarrow ships with Streamlit
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("audio_filename", pa.string()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+        ("analysis_prompt", pa.string()),
+        ("transcription", pa.string()),
+        ("analysis", pa.string()),
+        ("analyses", pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        # One row group per batch keeps memory flat on the way out as well
+        for rows in batches:
+            columns = [list(column) for column in zip(*rows)]
+            columns[-1] = [None if v is None else json.dumps(v, ensure_ascii=False) for v in columns[-1]]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            count += len(rows)
+    return count
+
+
+WRITERS = {"ndjson": _write_ndjson, "csv": _write_csv, "parquet": _write_parquet}
+
+
+def export_interviews(db, out, fmt="ndjson", compress=False, include_versions=False, batch_size=500):
+    """
+    Streams every interview into the binary file object `out` as NDJSON, CSV or Parquet,
+    one database batch at a time. `compress` gzips NDJSON and CSV (Parquet is always
+    zstd-compressed). Returns the number of interviews written.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    batches = db.iter_export_batches(batch_size, include_versions)
+    try:
+        if compress and fmt != "parquet":
+            with gzip.GzipFile(fileobj=out, mode="wb") as compressed:
+                return WRITERS[fmt](batches, compressed)
+        return WRITERS[fmt](batches, out)
+    finally:
+        # Returns the connection to the pool even if writing failed half way
+        batches.close()
@@ -1,57 +1,398 @@
+import asyncio
 import os
+import time
 from database import Database
+from services import metrics
 from services.llm_service import LLMService
+from services.job_queue import JobQueue
+from services.transcription_cache import TranscriptionCache, hash_audio
+from services.analysis_cache import AnalysisCache, analysis_cache_key
+from services.section_analyzer import SectionAnalyzer
+from services.audio_preprocessor import AudioPreprocessor
+from services.audio_upload import AudioUpload, UPLOAD_MEMORY_LIMIT_BYTES, get_upload_stats
+from services.interview_view import InterviewSessionCache
+from services.interview_export import export_interviews
+
 
 class InterviewOrchestrator:
     def __init__(self):
         self.db = Database()
         self.llm_service = LLMService()
+        self.jobs = JobQueue()
+        self.transcription_cache = TranscriptionCache(self.db)
+        self.analysis_cache = AnalysisCache(self.db)
+        self.preprocessor = AudioPreprocessor(self.db)
+        self.checkpoint_seconds = float(os.getenv("ANALYSIS_CHECKPOINT_SECONDS", "2"))
+        # "single": one completion for the whole report; "sections": one concurrent completion per section
+        self.analysis_mode = os.getenv("ANALYSIS_MODE", "single")
+        self.section_analyzer = SectionAnalyzer(
+            self.llm_service,
+            self.analysis_cache,
+            int(os.getenv("ANALYSIS_SECTION_CONCURRENCY", "6")),
+        )
 
     def get_all_interviews(self):
         return self.db.get_all_interviews()
 
+    def list_interviews(self, limit=20, cursor=None, search=None):
+        return self.db.list_interviews(limit, cursor, search)
+
+    def count_interviews(self, search=None):
+        return self.db.count_interviews(search)
+
+    def search_interviews(self, text, limit=10):
+        return self.db.search_interviews(text, limit)
+
     def get_interview(self, interview_id):
         return self.db.get_interview(interview_id)
 
+    def load_interview(self, interview_id, session_cache=None):
+        """
+        Returns a LazyInterview: metadata now, transcription and analysis on first access.
+        Pass the same InterviewSessionCache across reruns to reuse already fetched fields.
+        """
+        if session_cache is None:
+            session_cache = InterviewSessionCache()
+        return session_cache.get(self.db, interview_id)
+
+    def get_interview_analysis(self, interview_id):
+        return self.db.get_interview_field(interview_id, "analysis")
+
     def process_new_interview(self, file_name, file_content, system_prompt):
         """
         Orchestrates the upload, transcription, persistence, and analysis of a new interview.
         Returns the new interview_id upon success.
         """
-        # Save file temporarily
-        file_path = f"temp_{file_name}"
+        audio_hash = hash_audio(file_content)
+
+        # Small uploads are transcribed straight from memory; large ones spill to UPLOAD_DIR
+        upload = AudioUpload.from_buffer(file_name, file_content)
         try:
-            with open(file_path, "wb") as f:
-                f.write(file_content)
-            
-            # 1. Transcribe
-            transcription_text = self.llm_service.transcribe_audio(file_path)
-            
+            return self.process_upload(upload, system_prompt, audio_hash=audio_hash)
+        finally:
+            upload.cleanup()
+
+    def process_upload(self, upload, system_prompt, on_progress=None, audio_hash=None, profile=None):
+        """
+        Runs transcription, persistence and analysis for an AudioUpload.
+        `on_progress(status, progress, **details)` is called when each stage starts.
+        When `audio_hash` is given, a previously transcribed recording skips Whisper.
+        Every stage is timed into the metrics table; `profile=True` also samples the stacks.
+        """
+        if on_progress is None:
+            def on_progress(status, progress, **details):
+                pass
+
+        with metrics.trace("process_interview", self.db, profile=profile) as current:
+            # 1. Transcribe (or reuse the transcription of an identical upload)
+            on_progress("transcribing", 10)
+            transcription_text = self.transcribe(upload, audio_hash)
+
             # 2. Save initial transcription to DB
-            interview_id = self.db.save_transcription(system_prompt, file_name, transcription_text)
-            
+            with metrics.span("save_transcription"):
+                interview_id = self.db.save_transcription(system_prompt, upload.file_name, transcription_text)
+
             if not interview_id:
                 raise Exception("Failed to save transcription to database.")
+            current.interview_id = interview_id
 
-            # 3. Analyze
-            analysis_text = self.llm_service.analyze_interview(transcription_text, system_prompt)
-            
-            # 4. Update DB with analysis
-            self.db.update_analysis(interview_id, analysis_text, system_prompt)
-            
-            return interview_id
-            
-        finally:
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            # 3. Analyze, checkpointing the partial analysis to the DB (4) as it streams in
+            on_progress("analyzing", 60, interview_id=interview_id)
+            for _ in self.stream_analysis(interview_id, transcription_text, system_prompt):
+                pass
+
+        return interview_id
 
-    def reanalyze_interview(self, interview_id, transcription_text, new_prompt):
+    def resume_upload(self, interview_id, system_prompt, on_progress=None, profile=None):
+        """
+        Finishes a job whose worker stopped after its interview was saved:
+        re-runs the analysis of the saved transcript instead of creating another interview.
+        """
+        if on_progress is None:
+            def on_progress(status, progress, **details):
+                pass
+
+        with metrics.trace("process_interview", self.db, interview_id=interview_id, profile=profile):
+            transcription_text = self.db.get_interview_field(interview_id, "transcription")
+            if transcription_text is None:
+                raise Exception(f"Interview {interview_id} of this job no longer exists.")
+            on_progress("analyzing", 60, interview_id=interview_id)
+            for _ in self.stream_analysis(interview_id, transcription_text, system_prompt):
+                pass
+
+        return interview_id
+
+    def transcribe(self, upload, audio_hash=None):
+        """
+        Transcribes an AudioUpload, or returns the cached transcription of identical audio.
+        """
+        with metrics.trace("transcribe", self.db):
+            with metrics.span("transcription_cache_lookup") as attributes:
+                transcription_text = self.transcription_cache.get(audio_hash) if audio_hash else None
+                attributes["hit"] = transcription_text is not None
+            if transcription_text is None:
+                # Whisper gets a mono, silence-trimmed Opus copy when that is smaller than the upload
+                prepared = self.preprocessor.prepare(upload, audio_hash)
+                try:
+                    if prepared:
+                        transcription_text = self.llm_service.transcribe_audio(
+                            prepared.upload, prepared.report["timestamp_map"]
+                        )
+                    else:
+                        transcription_text = self.llm_service.transcribe_audio(upload)
+                finally:
+                    if prepared:
+                        prepared.cleanup()
+                if audio_hash:
+                    self.transcription_cache.put(audio_hash, transcription_text)
+        return transcription_text
+
+    def enqueue_new_interview(self, file_name, file_content, system_prompt, profile=False):
+        """
+        Hands the upload over to the workers and queues it for processing.
+        Small uploads travel through Redis; large ones are spilled to the shared UPLOAD_DIR.
+        Returns the job_id immediately; poll get_job() for status.
+        With `profile`, the worker samples the job's stacks while processing it.
+        """
+        with metrics.trace("enqueue_interview", self.db):
+            job_id = self.jobs.new_job_id()
+            payload = {
+                "file_name": file_name,
+                "system_prompt": system_prompt,
+                "audio_hash": hash_audio(file_content),
+            }
+            if profile:
+                payload["profile"] = True
+            if memoryview(file_content).nbytes <= UPLOAD_MEMORY_LIMIT_BYTES:
+                with metrics.span("store_audio", bytes=memoryview(file_content).nbytes):
+                    self.jobs.store_audio(job_id, file_content)
+            else:
+                payload["file_path"] = AudioUpload.from_buffer(file_name, file_content).local_path()
+
+            self.jobs.enqueue(job_id, payload)
+        return job_id
+
+    def load_job_upload(self, job_id, payload):
+        """
+        Rebuilds the AudioUpload of a queued job inside a worker.
+        """
+        if payload.get("file_path"):
+            return AudioUpload(payload["file_name"], path=payload["file_path"])
+        return AudioUpload(payload["file_name"], buffer=self.jobs.load_audio(job_id))
+
+    def get_upload_stats(self):
+        return get_upload_stats()
+
+    def get_preprocessing_totals(self):
+        return self.db.get_preprocessing_totals()
+
+    def export_interviews(self, out, fmt="ndjson", compress=False, include_versions=False):
+        with metrics.trace("export_interviews", self.db):
+            with metrics.span("write_export", format=fmt) as attributes:
+                attributes["rows"] = export_interviews(self.db, out, fmt, compress, include_versions)
+        return attributes["rows"]
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _use_sections(self, transcription_text, prompt, mode):
+        return mode == "sections" and self.section_analyzer.supports(transcription_text, prompt)
+
+    def _model_label(self, sections=False):
+        # Section mode assembles a differently shaped report, so it gets its own cache entries and label
+        if sections:
+            return f"{self.llm_service.analysis_model}/sections"
+        return self.llm_service.analysis_model
+
+    def _analysis_cache_key(self, transcription_text, prompt, sections=False):
+        return analysis_cache_key(
+            transcription_text,
+            prompt,
+            self._model_label(sections),
+            self.llm_service.analysis_temperature,
+        )
+
+    def _generate_analysis(self, transcription_text, prompt, sections):
+        if sections:
+            return self.section_analyzer.stream(transcription_text, prompt)
+        return self.llm_service.stream_analysis(transcription_text, prompt)
+
+    def analyze(self, transcription_text, prompt, mode=None):
+        """
+        Returns the analysis for this transcript and prompt, calling the model only
+        if the same transcript, prompt, model and temperature were never analyzed before.
+        """
+        with metrics.trace("analysis", self.db):
+            sections = self._use_sections(transcription_text, prompt, mode or self.analysis_mode)
+            cache_key = self._analysis_cache_key(transcription_text, prompt, sections)
+            with metrics.span("analysis_cache_lookup") as attributes:
+                analysis_text = self.analysis_cache.get(cache_key)
+                attributes["hit"] = analysis_text is not None
+            if analysis_text is None:
+                if sections:
+                    analysis_text = "".join(self.section_analyzer.stream(transcription_text, prompt))
+                else:
+                    analysis_text = self.llm_service.analyze_interview(transcription_text, prompt)
+                self.analysis_cache.put(cache_key, analysis_text)
+        return analysis_text
+
+    @metrics.traced_generator
+    def stream_analysis(self, interview_id, transcription_text, prompt, mode=None, profile=None):
+        """
+        Yields the analysis of an interview as the model generates it.
+        The partial text is saved every ANALYSIS_CHECKPOINT_SECONDS, and whatever was
+        generated is kept if the stream is interrupted; only complete analyses are cached.
+        """
+        with metrics.trace("stream_analysis", self.db, interview_id, profile=profile):
+            sections = self._use_sections(transcription_text, prompt, mode or self.analysis_mode)
+            cache_key = self._analysis_cache_key(transcription_text, prompt, sections)
+            with metrics.span("analysis_cache_lookup") as attributes:
+                cached = self.analysis_cache.get(cache_key)
+                attributes["hit"] = cached is not None
+            if cached is not None:
+                with metrics.span("update_analysis"):
+                    self._save_current_analysis(interview_id, prompt, self._model_label(sections), cached)
+                yield cached
+                return
+
+            parts = []
+            completed = False
+            last_checkpoint = time.monotonic()
+            try:
+                for token in self._generate_analysis(transcription_text, prompt, sections):
+                    parts.append(token)
+                    yield token
+                    if time.monotonic() - last_checkpoint >= self.checkpoint_seconds:
+                        with metrics.span("update_analysis", checkpoint=True):
+                            self.db.update_analysis(interview_id, "".join(parts), prompt)
+                        last_checkpoint = time.monotonic()
+                completed = True
+            finally:
+                analysis_text = "".join(parts)
+                # Only a complete analysis becomes a new version; a partial one is just kept as current
+                if completed:
+                    self.analysis_cache.put(cache_key, analysis_text)
+                    with metrics.span("update_analysis"):
+                        self._save_current_analysis(interview_id, prompt, self._model_label(sections), analysis_text)
+                elif analysis_text:
+                    with metrics.span("update_analysis"):
+                        self.db.update_analysis(interview_id, analysis_text, prompt)
+
+    def _save_current_analysis(self, interview_id, prompt, model, analysis_text):
+        """
+        Saves a completed analysis as a new version and makes it the current one.
+        Raises if it could not be saved, so callers don't report a lost analysis as done.
+        """
+        if self.db.save_analysis_versions(interview_id, [(prompt, model, analysis_text)], make_current=True) is None:
+            raise RuntimeError(f"The new analysis of interview {interview_id} could not be saved.")
+
+    def get_analysis_cache_stats(self):
+        return self.analysis_cache.stats()
+
+    def get_transcription_cache_stats(self):
+        return self.transcription_cache.stats()
+
+    def reanalyze_interview(self, interview_id, transcription_text, new_prompt, mode=None, profile=None):
         """
         Re-runs the analysis on an existing transcription.
         """
-        new_analysis = self.llm_service.analyze_interview(transcription_text, new_prompt)
-        self.db.update_analysis(interview_id, new_analysis, new_prompt)
+        with metrics.trace("reanalyze_interview", self.db, interview_id, profile=profile):
+            new_analysis = self.analyze(transcription_text, new_prompt, mode)
+            sections = self._use_sections(transcription_text, new_prompt, mode or self.analysis_mode)
+            with metrics.span("update_analysis"):
+                self._save_current_analysis(interview_id, new_prompt, self._model_label(sections), new_analysis)
         return new_analysis
 
+    def analyze_prompts(self, interview_id, transcription_text, prompts, mode=None, profile=None):
+        """
+        Runs several prompts against one transcript concurrently, so it takes about as long
+        as the slowest one, and stores each result as a new analysis version.
+        The current analysis is left alone. Returns [(analysis_id, prompt, analysis)];
+        analysis_id is None for results that could not be saved.
+        """
+        with metrics.trace("analyze_prompts", self.db, interview_id, profile=profile):
+            results = asyncio.run(self._analyze_prompts(transcription_text, prompts, mode or self.analysis_mode))
+            with metrics.span("save_analysis_versions") as attributes:
+                analysis_ids = self.db.save_analysis_versions(
+                    interview_id, [(prompt, model, text) for prompt, (text, model) in zip(prompts, results)]
+                )
+                attributes["saved"] = analysis_ids is not None
+            if analysis_ids is None:
+                # The results are still worth showing; the caller reports them as not saved
+                analysis_ids = [None] * len(prompts)
+        return [(analysis_id, prompt, text) for analysis_id, prompt, (text, _) in zip(analysis_ids, prompts, results)]
+
+    async def _analyze_prompts(self, transcription_text, prompts, mode):
+        sections = [self._use_sections(transcription_text, prompt, mode) for prompt in prompts]
+        texts = [None] * len(prompts)
+        batched = []
+        for i, prompt in enumerate(prompts):
+            if not sections[i]:
+                texts[i] = self.analysis_cache.get(self._analysis_cache_key(transcription_text, prompt))
+                if texts[i] is None:
+                    batched.append(i)
+
+        async def run_batched():
+            if not batched:
+                return
+            generated = await self.llm_service.analyze_interviews(transcription_text, [prompts[i] for i in batched])
+            for i, text in zip(batched, generated):
+                texts[i] = text
+                self.analysis_cache.put(self._analysis_cache_key(transcription_text, prompts[i]), text)
+
+        async def run_sections(i):
+            # analyze() checks the cache and fans the sections out on its own threads
+            texts[i] = await asyncio.to_thread(self.analyze, transcription_text, prompts[i], "sections")
+
+        await asyncio.gather(run_batched(), *(run_sections(i) for i, by_section in enumerate(sections) if by_section))
+        return [(text, self._model_label(by_section)) for text, by_section in zip(texts, sections)]
+
+    def get_analysis_versions(self, interview_id):
+        return self.db.get_analysis_versions(interview_id)
+
+    def get_analysis_version(self, analysis_id):
+        return self.db.get_analysis_version(analysis_id)
+
+    def set_current_analysis(self, interview_id, analysis_id):
+        return self.db.set_current_analysis(interview_id, analysis_id)
+
     def delete_interview(self, interview_id):
-        return self.db.delete_interview(interview_id)
+        """
+        Deletes an interview and its analysis versions, and purges its transcript and
+        analyses from the caches so they can't be served for a later upload.
+        """
+        transcription = self.db.get_interview_field(interview_id, "transcription")
+        cache_keys = self._version_cache_keys(interview_id, transcription) if transcription else []
+        audio_hashes = self.db.delete_interview(interview_id, cache_keys)
+        if audio_hashes is None:
+            return False
+        self.transcription_cache.forget(audio_hashes)
+        self.analysis_cache.forget(cache_keys)
+        return True
+
+    def _version_cache_keys(self, interview_id, transcription_text):
+        # Every version was cached under the model that produced it; section reports also per section
+        keys = set()
+        temperature = self.llm_service.analysis_temperature
+        for _, _, prompt, model, _, _ in self.db.get_analysis_versions(interview_id):
+            keys.add(analysis_cache_key(transcription_text, prompt, model, temperature))
+            if model.endswith("/sections"):
+                keys.update(self.section_analyzer.cache_keys(
+                    transcription_text, prompt, model[:-len("/sections")]
+                ))
+        return list(keys)
+
+    def get_stage_summary(self, hours=24):
+        return self.db.get_stage_summary(hours)
+
+    def get_stage_durations(self, stage, hours=24):
+        return self.db.get_stage_durations(stage, hours)
+
+    def get_recent_traces(self, limit=50):
+        return self.db.get_recent_traces(limit)
+
+    def get_trace_spans(self, trace_id):
+        return self.db.get_trace_spans(trace_id)
+
+    def get_profile(self, trace_id):
+        return self.db.get_profile(trace_id)
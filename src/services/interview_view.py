@@ -0,0 +1,78 @@
+import math
+from collections import OrderedDict
+
+_NOT_LOADED = object()
+
+
+class LazyInterview:
+    """
+    An interview whose metadata is loaded up front; the transcription and analysis
+    are only fetched from the database when first read, and transcript pages one at a time.
+    """
+
+    def __init__(self, db, meta):
+        self.db = db
+        (self.id, self.filename, self.analysis_prompt, self.created_at, self.updated_at,
+         self.transcription_size, self.analysis_size) = meta
+        self._analysis = _NOT_LOADED
+        self._transcription = _NOT_LOADED
+        self._pages = {}
+
+    @property
+    def analysis(self):
+        if self._analysis is _NOT_LOADED:
+            self._analysis = self.db.get_interview_field(self.id, "analysis")
+        return self._analysis
+
+    @property
+    def transcription(self):
+        if self._transcription is _NOT_LOADED:
+            self._transcription = self.db.get_interview_field(self.id, "transcription")
+        return self._transcription
+
+    def transcription_page(self, page, page_size):
+        """
+        Returns (text, page_count) for 1-based `page` of the transcription.
+        """
+        key = (page, page_size)
+        if key not in self._pages:
+            if self._transcription is not _NOT_LOADED:
+                text = (self._transcription or "")[(page - 1) * page_size:page * page_size]
+                total = len(self._transcription or "")
+            else:
+                text, total = self.db.get_transcription_page(self.id, (page - 1) * page_size, page_size)
+            self._pages[key] = (text or "", max(1, math.ceil(total / page_size)))
+        return self._pages[key]
+
+
+class InterviewSessionCache:
+    """
+    Per-session cache of LazyInterview objects. Every lookup re-reads the (small)
+    metadata row, and a cached entry is reused only while its updated_at matches,
+    so analysis updates from any process, and deletions, invalidate it.
+    """
+
+    def __init__(self, max_entries=5):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, db, interview_id):
+        meta = db.get_interview_meta(interview_id)
+        if meta is None:
+            self.invalidate(interview_id)
+            return None
+
+        cached = self._entries.get(interview_id)
+        if cached is not None and cached.updated_at == meta[4]:
+            self._entries.move_to_end(interview_id)
+            return cached
+
+        interview = LazyInterview(db, meta)
+        self._entries[interview_id] = interview
+        self._entries.move_to_end(interview_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return interview
+
+    def invalidate(self, interview_id):
+        self._entries.pop(interview_id, None)
@@ -0,0 +1,186 @@
+import json
+import os
+import time
+import uuid
+from redis_client import get_redis
+
+JOB_STATUSES = ("queued", "transcribing", "analyzing", "done", "failed")
+
+# Moves the oldest pending job to the processing list and stamps its first heartbeat in one step,
+# so requeue_stale never sees a claimed job without a heartbeat. Jobs whose hash expired are dropped.
+# KEYS: pending list, processing list; ARGV: job key prefix, now
+CLAIM_SCRIPT = """
+local job_id = redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT')
+if not job_id then
+    return false
+end
+local key = ARGV[1] .. job_id
+if redis.call('HEXISTS', key, 'payload') == 0 then
+    redis.call('LREM', KEYS[2], 1, job_id)
+    return {job_id, false}
+end
+redis.call('HSET', key, 'heartbeat', ARGV[2])
+redis.call('HINCRBY', key, 'attempts', 1)
+return {job_id, redis.call('HGET', key, 'payload')}
+"""
+
+
+class JobQueue:
+    """
+    Redis-backed queue of interview processing jobs.
+    Job state lives in a `job:<id>` hash so any page or worker can read it.
+    """
+
+    pending_key = "jobs:pending"
+    processing_key = "jobs:processing"
+    dead_key = "jobs:dead"
+
+    def __init__(self):
+        self.r = get_redis()
+        self.r_binary = get_redis(decode_responses=False)
+        self.job_ttl = int(os.getenv("JOB_TTL", "86400"))
+        self.stale_after = int(os.getenv("JOB_STALE_AFTER", "120"))
+        # A job whose worker died this many times goes to the dead-letter list instead of back in the queue
+        self.max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.claim_script = self.r.register_script(CLAIM_SCRIPT)
+
+    def _job_key(self, job_id):
+        return f"job:{job_id}"
+
+    def _audio_key(self, job_id):
+        return f"job:{job_id}:audio"
+
+    def new_job_id(self):
+        return uuid.uuid4().hex
+
+    def enqueue(self, job_id, payload):
+        now = time.time()
+        key = self._job_key(job_id)
+        pipe = self.r.pipeline()
+        pipe.hset(key, mapping={
+            "status": "queued",
+            "progress": 0,
+            "payload": json.dumps(payload),
+            "created_at": now,
+            "updated_at": now,
+        })
+        pipe.expire(key, self.job_ttl)
+        pipe.lpush(self.pending_key, job_id)
+        pipe.execute()
+        return job_id
+
+    def store_audio(self, job_id, buffer):
+        # redis-py sends memoryviews as-is, so the upload buffer isn't copied
+        self.r_binary.setex(self._audio_key(job_id), self.job_ttl, memoryview(buffer))
+
+    def load_audio(self, job_id):
+        audio = self.r_binary.get(self._audio_key(job_id))
+        if audio is None:
+            raise Exception("Uploaded audio for this job has expired.")
+        return audio
+
+    def delete_audio(self, job_id):
+        self.r_binary.delete(self._audio_key(job_id))
+
+    def dequeue(self, timeout=5):
+        """
+        Blocks until a job is available and moves it to the processing list.
+        Returns (job_id, payload) or None on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            claimed = self.claim_script(keys=[self.pending_key, self.processing_key], args=[self._job_key(""), time.time()])
+            if claimed:
+                job_id, payload = claimed
+                if payload:
+                    return job_id, json.loads(payload)
+                # Job hash expired while queued; nothing left to do.
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            # Moving the list's tail onto itself blocks until a job arrives without taking it;
+            # the claim script then takes it atomically
+            self.r.blmove(self.pending_key, self.pending_key, max(remaining, 0.01), "RIGHT", "RIGHT")
+
+    def get(self, job_id):
+        job = self.r.hgetall(self._job_key(job_id))
+        if not job:
+            return None
+        job.pop("payload", None)
+        job["progress"] = int(job.get("progress", 0))
+        if job.get("interview_id"):
+            job["interview_id"] = int(job["interview_id"])
+        return job
+
+    def update(self, job_id, status, progress, **details):
+        self.r.hset(self._job_key(job_id), mapping={
+            **details,
+            "status": status,
+            "progress": progress,
+            "updated_at": time.time(),
+            "heartbeat": time.time(),
+        })
+
+    def heartbeat(self, job_id):
+        self.r.hset(self._job_key(job_id), "heartbeat", time.time())
+
+    def complete(self, job_id, interview_id):
+        pipe = self.r.pipeline()
+        pipe.hset(self._job_key(job_id), mapping={
+            "status": "done",
+            "progress": 100,
+            "interview_id": interview_id,
+            "updated_at": time.time(),
+        })
+        pipe.lrem(self.processing_key, 1, job_id)
+        pipe.execute()
+
+    def fail(self, job_id, error):
+        pipe = self.r.pipeline()
+        pipe.hset(self._job_key(job_id), mapping={
+            "status": "failed",
+            "error": error,
+            "updated_at": time.time(),
+        })
+        pipe.lrem(self.processing_key, 1, job_id)
+        pipe.execute()
+
+    def requeue_stale(self):
+        """
+        Puts back jobs whose worker stopped sending heartbeats (crash, restart, OOM kill).
+        A requeued job keeps the id of the interview it already saved, so the retry resumes it.
+        Jobs that already took down JOB_MAX_ATTEMPTS workers are failed and moved to the
+        dead-letter list instead, and their uploaded audio is deleted. Returns the number of requeued jobs.
+        """
+        requeued = 0
+        now = time.time()
+        for job_id in self.r.lrange(self.processing_key, 0, -1):
+            key = self._job_key(job_id)
+            heartbeat, attempts, payload = self.r.hmget(key, "heartbeat", "attempts", "payload")
+            if heartbeat is not None and now - float(heartbeat) < self.stale_after:
+                continue
+            if not self.r.lrem(self.processing_key, 1, job_id):
+                # Another worker got to it first
+                continue
+            pipe = self.r.pipeline()
+            if int(attempts or 0) >= self.max_attempts:
+                pipe.hset(key, mapping={
+                    "status": "failed",
+                    "error": f"Gave up after {attempts} attempts; the worker stopped each time.",
+                    "updated_at": now,
+                })
+                pipe.lpush(self.dead_key, job_id)
+                pipe.delete(self._audio_key(job_id))
+                self._delete_spilled_upload(payload)
+            else:
+                pipe.hset(key, mapping={"status": "queued", "progress": 0, "updated_at": now})
+                pipe.lpush(self.pending_key, job_id)
+                requeued += 1
+            pipe.execute()
+        return requeued
+
+    def _delete_spilled_upload(self, payload):
+        file_path = json.loads(payload).get("file_path") if payload else None
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
@@ -1,33 +1,202 @@
+import asyncio
 import os
-from langchain_openai import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from services import clients, metrics
+from services.map_reduce_analyzer import MapReduceAnalyzer, count_tokens
+from services.rate_limiter import RateGovernor, estimate_chat_tokens
+from services.audio_upload import AudioUpload
+from services.audio_preprocessor import to_original_time
+from services.audio_segmenter import (
+    detect_silences,
+    extract_segment,
+    merge_transcripts,
+    plan_segments,
+    probe_duration,
+)
+
+# Whisper rejects uploads above 25 MB
+WHISPER_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
 
 class LLMService:
-    def __init__(self):
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        # Initialize the OpenAI client for transcription (Whisper)
-        self.client = OpenAI(api_key=self.openai_api_key)
+    def __init__(self, priority="interactive"):
+        # OpenAI clients live in the process-wide registry and are built on first use,
+        # so creating the service doesn't import the LLM stack
+        self.governor = RateGovernor()
+        # "interactive" requests go ahead of "bulk" ones when the shared budget runs low
+        self.priority = priority
+        self.chunk_seconds = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "600"))
+        self.overlap_seconds = float(os.getenv("TRANSCRIBE_OVERLAP_SECONDS", "2"))
+        self.transcribe_concurrency = int(os.getenv("TRANSCRIBE_CONCURRENCY", "4"))
+        self.analysis_model = "gpt-4o"
+        self.analysis_temperature = 0.5
+        self.map_reduce_threshold_tokens = int(os.getenv("ANALYSIS_MAP_REDUCE_THRESHOLD_TOKENS", "60000"))
+        self.map_reduce_chunk_tokens = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "8000"))
+        self.map_reduce_concurrency = int(os.getenv("ANALYSIS_MAP_CONCURRENCY", "4"))
+        self.fanout_concurrency = int(os.getenv("ANALYSIS_FANOUT_CONCURRENCY", "4"))
 
-    def transcribe_audio(self, file_path):
+    def warm(self):
+        """
+        Imports the LLM stack and builds the shared clients ahead of the first request.
         """
-        Transcribes an audio file using OpenAI's Whisper model.
+        clients.warm(self.analysis_model, self.analysis_temperature)
+
+    @property
+    def client(self):
+        # OpenAI client for transcription (Whisper)
+        return clients.openai_client()
+
+    def transcribe_audio(self, audio, timestamp_map=None):
         """
-        with open(file_path, "rb") as audio_file:
-            transcription_response = self.client.audio.transcriptions.create(
-                model="whisper-1", 
-                file=audio_file
+        Transcribes a recording (an AudioUpload or a file path) using OpenAI's Whisper model.
+        Recordings longer than one chunk, or too large for a single upload, are transcribed in segments.
+        For preprocessed audio, `timestamp_map` places the segments in the original recording.
+        """
+        if isinstance(audio, str):
+            audio = AudioUpload(audio, path=audio)
+
+        duration = probe_duration(audio.path if audio.path is not None else audio.buffer)
+        too_long = duration is not None and duration > self.chunk_seconds + self.overlap_seconds
+        too_large = audio.size > WHISPER_MAX_UPLOAD_BYTES
+        if duration is not None and (too_long or too_large):
+            # ffmpeg needs to seek through the file to cut segments
+            return self.transcribe_audio_segmented(audio.local_path(), duration, timestamp_map)
+        if too_large:
+            # Without a duration there's nothing to plan segments on, and Whisper would reject the upload
+            raise ValueError(
+                f"{audio.file_name} is larger than {WHISPER_MAX_UPLOAD_BYTES // (1024 * 1024)} MB and could not be "
+                "read by ffprobe, so it can't be split for transcription. Please convert it to a common audio format."
             )
+
+        with audio.open() as audio_file:
+            def transcribe():
+                # Rewind in case a previous attempt was rate limited mid-upload
+                audio_file.seek(0)
+                return self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=(audio.file_name, audio_file)
+                )
+
+            with metrics.span("whisper", bytes=audio.size, audio_seconds=duration):
+                transcription_response = self.governor.call("whisper", transcribe, priority=self.priority)
         return transcription_response.text
 
-    def analyze_interview(self, transcription, system_prompt):
+    def transcribe_audio_segmented(self, file_path, duration, timestamp_map=None):
         """
-        Analyzes the interview transcription using a ChatOpenAI model.
+        Splits the recording into overlapping chunks (cut at silences where possible),
+        transcribes them concurrently and stitches the text back together in order.
+        Each whisper span records where its segment starts and ends in the original recording.
         """
-        chat_model = ChatOpenAI(model="gpt-4o", temperature=0.5, api_key=self.openai_api_key)
-        messages = [
+        silences = detect_silences(file_path)
+        segments = plan_segments(duration, silences, self.chunk_seconds, self.overlap_seconds)
+
+        def transcribe_segment(segment):
+            start, end = segment
+            with metrics.span("extract_segment", audio_seconds=end - start):
+                audio_bytes = extract_segment(file_path, start, end)
+            with metrics.span(
+                "whisper",
+                bytes=len(audio_bytes),
+                audio_seconds=end - start,
+                original_start=to_original_time(timestamp_map, start),
+                original_end=to_original_time(timestamp_map, end),
+            ):
+                response = self.governor.call(
+                    "whisper",
+                    lambda: self.client.audio.transcriptions.create(
+                        model="whisper-1",
+                        file=("segment.mp3", audio_bytes)
+                    ),
+                    priority=self.priority,
+                )
+            return response.text
+
+        with ThreadPoolExecutor(max_workers=self.transcribe_concurrency) as executor:
+            texts = list(executor.map(metrics.bind(transcribe_segment), segments))
+        return merge_transcripts(texts)
+
+    def _chat_model(self):
+        return clients.chat_model(self.analysis_model, self.analysis_temperature)
+
+    def _analysis_messages(self, transcription, system_prompt):
+        SystemMessage, HumanMessage = clients.message_types()
+        return [
             SystemMessage(content=system_prompt),
             HumanMessage(content=f"Transcript:\n{transcription}")
         ]
-        response = chat_model.invoke(messages)
+
+    def _map_reduce_analyzer(self):
+        # Its map step fans out on a fresh event loop
+        return MapReduceAnalyzer(
+            clients.new_chat_model(self.analysis_model, self.analysis_temperature),
+            self.map_reduce_chunk_tokens,
+            self.map_reduce_concurrency,
+            self.governor,
+            self.priority,
+        )
+
+    def needs_map_reduce(self, transcription):
+        """
+        True if the transcript is above ANALYSIS_MAP_REDUCE_THRESHOLD_TOKENS.
+        """
+        return count_tokens(transcription) > self.map_reduce_threshold_tokens
+
+    def analyze_interview(self, transcription, system_prompt):
+        """
+        Analyzes the interview transcription using a ChatOpenAI model.
+        Transcripts above ANALYSIS_MAP_REDUCE_THRESHOLD_TOKENS are analyzed with map-reduce.
+        """
+        if self.needs_map_reduce(transcription):
+            return self._map_reduce_analyzer().analyze(transcription, system_prompt)
+
+        chat_model = self._chat_model()
+        messages = self._analysis_messages(transcription, system_prompt)
+        with metrics.span("openai_chat", model=self.analysis_model) as attributes:
+            response = self.governor.call(
+                "chat", lambda: chat_model.invoke(messages), estimate_chat_tokens(messages), self.priority
+            )
+            metrics.record_usage(attributes, response)
         return response.content
+
+    async def analyze_interviews(self, transcription, system_prompts):
+        """
+        Analyzes one transcript with several prompts concurrently; returns the analyses in prompt order.
+        """
+        if self.needs_map_reduce(transcription):
+            return list(await asyncio.gather(*(
+                asyncio.to_thread(self.analyze_interview, transcription, system_prompt)
+                for system_prompt in system_prompts
+            )))
+
+        chat_model = clients.new_chat_model(self.analysis_model, self.analysis_temperature)
+        semaphore = asyncio.Semaphore(self.fanout_concurrency)
+
+        async def run(system_prompt):
+            messages = self._analysis_messages(transcription, system_prompt)
+            async with semaphore:
+                with metrics.span("openai_chat", model=self.analysis_model) as attributes:
+                    response = await self.governor.acall(
+                        "chat", lambda: chat_model.ainvoke(messages), estimate_chat_tokens(messages), self.priority
+                    )
+                    metrics.record_usage(attributes, response)
+            return response.content
+
+        return list(await asyncio.gather(*(run(system_prompt) for system_prompt in system_prompts)))
+
+    def stream_analysis(self, transcription, system_prompt):
+        """
+        Same as analyze_interview, but yields the markdown as the model generates it.
+        """
+        if self.needs_map_reduce(transcription):
+            yield from self._map_reduce_analyzer().stream(transcription, system_prompt)
+            return
+
+        chat_model = self._chat_model()
+        messages = self._analysis_messages(transcription, system_prompt)
+        with metrics.span("openai_chat", model=self.analysis_model, streamed=True) as attributes:
+            for chunk in self.governor.stream(
+                "chat", lambda: chat_model.stream(messages), estimate_chat_tokens(messages), self.priority
+            ):
+                metrics.record_usage(attributes, chunk)
+                if chunk.content:
+                    yield chunk.content
@@ -0,0 +1,179 @@
+import asyncio
+import re
+from services import clients, metrics
+from services.rate_limiter import estimate_chat_tokens
+
+# A line starting with "Name:" or "SPEAKER 1:" marks a new speaker turn
+SPEAKER_TURN = re.compile(r"^\s*[\w .'-]{1,40}:\s")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+MAP_PROMPT = """You are reading part {index} of {total} of a job interview transcript.
+Extract every fact from this part that is relevant to the analysis instructions below: quotes, skills,
+questions asked, stories told, hesitations, signals from the interviewer. Use terse markdown bullets grouped
+under the section names from the instructions. Do not write the final analysis and do not invent anything.
+
+Analysis instructions:
+{instructions}"""
+
+COLLAPSE_PROMPT = """Merge the following notes, extracted from consecutive parts of one job interview,
+into a single set of terse markdown bullets grouped by section. Keep every distinct fact and quote; drop only duplicates."""
+
+REDUCE_INTRO = """The transcript was too long to analyze in one pass. Below are notes extracted,
+in order, from each consecutive part of it. Treat them as the transcript.
+
+"""
+
+
+ENCODING_NAME = "o200k_base"
+
+
+def count_tokens(text, encoding_name=ENCODING_NAME):
+    return len(clients.encoding(encoding_name).encode(text, disallowed_special=()))
+
+
+class MapReduceAnalyzer:
+    """
+    Analyzes transcripts that don't fit comfortably in one request:
+    split into token-budgeted, speaker-aware chunks, extract notes from each chunk
+    concurrently (map), then write the final report from the notes (reduce).
+    """
+
+    def __init__(self, chat_model, chunk_tokens, concurrency, governor, priority, encoding_name=ENCODING_NAME):
+        self.chat_model = chat_model
+        self.governor = governor
+        self.priority = priority
+        self.chunk_tokens = chunk_tokens
+        self.concurrency = concurrency
+        self.encoding = clients.encoding(encoding_name)
+
+    def count_tokens(self, text):
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _split_turns(self, transcription):
+        lines = [line for line in transcription.splitlines() if line.strip()]
+        if len(lines) > 1 and sum(1 for line in lines if SPEAKER_TURN.match(line)) >= len(lines) / 2:
+            # Labeled transcript: keep unlabeled continuation lines with their speaker
+            turns = []
+            for line in lines:
+                if SPEAKER_TURN.match(line) or not turns:
+                    turns.append(line)
+                else:
+                    turns[-1] += "\n" + line
+            return turns
+        return [s for s in SENTENCE_END.split(transcription) if s.strip()]
+
+    def _split_oversized(self, turn):
+        tokens = self.encoding.encode(turn, disallowed_special=())
+        return [
+            self.encoding.decode(tokens[i:i + self.chunk_tokens])
+            for i in range(0, len(tokens), self.chunk_tokens)
+        ]
+
+    def split_transcript(self, transcription):
+        """
+        Packs whole speaker turns (or sentences, for unlabeled transcripts) into chunks
+        of at most `chunk_tokens`; only a single turn larger than the budget is cut mid-way.
+        """
+        chunks = []
+        current, current_tokens = [], 0
+        for turn in self._split_turns(transcription):
+            turn_tokens = self.count_tokens(turn)
+            pieces = self._split_oversized(turn) if turn_tokens > self.chunk_tokens else [turn]
+            for piece in pieces:
+                piece_tokens = turn_tokens if len(pieces) == 1 else self.count_tokens(piece)
+                if current and current_tokens + piece_tokens > self.chunk_tokens:
+                    chunks.append("\n".join(current))
+                    current, current_tokens = [], 0
+                current.append(piece)
+                current_tokens += piece_tokens
+        if current:
+            chunks.append("\n".join(current))
+        return chunks
+
+    async def _abatch(self, message_lists):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(messages):
+            async with semaphore:
+                with metrics.span("openai_chat_map", model=self.chat_model.model_name) as attributes:
+                    response = await self.governor.acall(
+                        "chat", lambda: self.chat_model.ainvoke(messages), estimate_chat_tokens(messages), self.priority
+                    )
+                    metrics.record_usage(attributes, response)
+                return response.content
+
+        return await asyncio.gather(*(run(messages) for messages in message_lists))
+
+    def _map(self, chunks, system_prompt):
+        SystemMessage, HumanMessage = clients.message_types()
+        message_lists = [
+            [
+                SystemMessage(content=MAP_PROMPT.format(index=i + 1, total=len(chunks), instructions=system_prompt)),
+                HumanMessage(content=f"Transcript part {i + 1}:\n{chunk}"),
+            ]
+            for i, chunk in enumerate(chunks)
+        ]
+        return asyncio.run(self._abatch(message_lists))
+
+    def _collapse(self, notes):
+        """
+        Merges neighbouring notes concurrently until they fit in one chunk budget.
+        """
+        SystemMessage, HumanMessage = clients.message_types()
+        while len(notes) > 1 and sum(self.count_tokens(n) for n in notes) > self.chunk_tokens:
+            groups, current, current_tokens = [], [], 0
+            for note in notes:
+                note_tokens = self.count_tokens(note)
+                if current and current_tokens + note_tokens > self.chunk_tokens:
+                    groups.append(current)
+                    current, current_tokens = [], 0
+                current.append(note)
+                current_tokens += note_tokens
+            groups.append(current)
+            if len(groups) == len(notes):
+                # Every note already fills a chunk on its own; merging can't shrink them further
+                break
+            message_lists = [
+                [SystemMessage(content=COLLAPSE_PROMPT), HumanMessage(content="\n\n---\n\n".join(group))]
+                for group in groups
+            ]
+            notes = asyncio.run(self._abatch(message_lists))
+        return notes
+
+    def _reduce_messages(self, notes, system_prompt):
+        SystemMessage, HumanMessage = clients.message_types()
+        body = "\n\n".join(f"## Notes from part {i + 1}\n{note}" for i, note in enumerate(notes))
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=REDUCE_INTRO + body),
+        ]
+
+    def _prepare(self, transcription, system_prompt):
+        with metrics.span("map_reduce_split") as attributes:
+            chunks = self.split_transcript(transcription)
+            attributes["chunks"] = len(chunks)
+        with metrics.span("map_reduce_map", chunks=len(chunks)):
+            notes = self._map(chunks, system_prompt)
+        with metrics.span("map_reduce_collapse") as attributes:
+            notes = self._collapse(notes)
+            attributes["notes"] = len(notes)
+        return self._reduce_messages(notes, system_prompt)
+
+    def analyze(self, transcription, system_prompt):
+        messages = self._prepare(transcription, system_prompt)
+        with metrics.span("openai_chat", model=self.chat_model.model_name) as attributes:
+            response = self.governor.call(
+                "chat", lambda: self.chat_model.invoke(messages), estimate_chat_tokens(messages), self.priority
+            )
+            metrics.record_usage(attributes, response)
+        return response.content
+
+    def stream(self, transcription, system_prompt):
+        messages = self._prepare(transcription, system_prompt)
+        with metrics.span("openai_chat", model=self.chat_model.model_name, streamed=True) as attributes:
+            for chunk in self.governor.stream(
+                "chat", lambda: self.chat_model.stream(messages), estimate_chat_tokens(messages), self.priority
+            ):
+                metrics.record_usage(attributes, chunk)
+                if chunk.content:
+                    yield chunk.content
@@ -0,0 +1,381 @@
+import contextvars
+import functools
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import redis
+from redis_client import get_redis
+
+# Histogram buckets (seconds) shared by the Prometheus endpoint and the admin page
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# Numeric span attributes that are also summed into Prometheus counters
+COUNTED_ATTRIBUTES = ("input_tokens", "output_tokens", "audio_seconds", "bytes")
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "10")) / 1000
+METRICS_RETENTION_DAYS = int(os.getenv("METRICS_RETENTION_DAYS", "30"))
+# Old metrics are deleted by at most one process per interval
+METRICS_EVICT_INTERVAL = int(os.getenv("METRICS_EVICT_INTERVAL_SECONDS", "3600"))
+
+STAGES_KEY = "metrics:stages"
+EVICT_KEY = "metrics:evicted"
+# Requests sent and connections opened by the shared OpenAI HTTP pool, across every process
+HTTP_KEY = "metrics:openai_http"
+
+_current = contextvars.ContextVar("metrics_trace", default=None)
+
+# OpenAI HTTP counts not yet added to Redis; flushed with the stage histograms
+_http_counts = Counter()
+_http_lock = threading.Lock()
+
+
+class Trace:
+    """
+    Spans recorded while handling one request, written to the database in one go when it ends.
+    """
+
+    def __init__(self, operation, interview_id=None):
+        self.trace_id = uuid.uuid4().hex
+        self.operation = operation
+        self.interview_id = interview_id
+        self.spans = []
+        self.threads = {threading.get_ident()}
+        self.lock = threading.Lock()
+
+    def add(self, stage, started_at, duration, error, attributes):
+        with self.lock:
+            self.spans.append((stage, started_at, duration, error, attributes))
+
+
+class StackSampler:
+    """
+    Sampling profiler: every PROFILE_INTERVAL_MS it records the Python stack of each
+    thread working on the trace, as folded stacks ("a;b;c count") for flame graphs.
+    """
+
+    def __init__(self, trace, interval=PROFILE_INTERVAL):
+        self.trace = trace
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self.trace.lock:
+                threads = list(self.trace.threads)
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def current_trace():
+    return _current.get()
+
+
+@contextmanager
+def span(stage, **attributes):
+    """
+    Times a block as one stage of the current trace. The yielded dict can be filled
+    with attributes (token counts, audio duration, ...) while the block runs.
+    Without an active trace nothing is recorded.
+    """
+    trace = _current.get()
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if trace is not None:
+            trace.add(stage, started_at, time.perf_counter() - start, error, attributes)
+
+
+@contextmanager
+def trace(operation, db, interview_id=None, profile=None):
+    """
+    Starts a trace for one request, or, inside an existing one, just a span.
+    Spans are saved to the metrics table and the Prometheus counters when it ends.
+    Profiling is on when `profile` is true, or for a PROFILE_SAMPLE_RATE share of traces.
+    """
+    parent = _current.get()
+    if parent is not None:
+        if interview_id is not None and parent.interview_id is None:
+            parent.interview_id = interview_id
+        with span(operation):
+            yield parent
+        return
+
+    current = Trace(operation, interview_id)
+    token = _current.set(current)
+    sampler = None
+    if profile or (profile is None and random.random() < PROFILE_SAMPLE_RATE):
+        sampler = StackSampler(current)
+        sampler.start()
+    try:
+        with span(operation):
+            yield current
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # A generator holding the trace was closed from another context
+            _current.set(None)
+        if sampler is not None:
+            sampler.stop()
+        flush(current, db, sampler)
+
+
+def bind(func):
+    """
+    Wraps `func` so it records into the caller's trace when run on a pool thread.
+    """
+    trace = _current.get()
+    if trace is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        token = _current.set(trace)
+        with trace.lock:
+            trace.threads.add(threading.get_ident())
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with trace.lock:
+                trace.threads.discard(threading.get_ident())
+            _current.reset(token)
+
+    return wrapper
+
+
+def traced_generator(func):
+    """
+    For generator functions that start a trace: runs every step of the generator in a
+    context of its own, so the trace isn't the caller's current trace between items.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        context = contextvars.copy_context()
+        generator = func(*args, **kwargs)
+        try:
+            while True:
+                try:
+                    item = context.run(next, generator)
+                except StopIteration:
+                    return
+                yield item
+        finally:
+            # Closing an abandoned stream still ends (and saves) its trace in the right context
+            context.run(generator.close)
+
+    return wrapper
+
+
+def record_timing(stage, seconds, db=None, **attributes):
+    """
+    Records a duration measured outside a span (an import, a page render): into the current
+    trace if there is one, else as a trace of its own when `db` is given, else only into
+    the Prometheus histograms.
+    """
+    started_at = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+    recorded = (stage, started_at, seconds, None, attributes)
+    trace = _current.get()
+    if trace is not None:
+        trace.add(*recorded)
+        return
+    if db is not None:
+        db.save_metrics(uuid.uuid4().hex, stage, None, [recorded])
+    record_histograms([recorded])
+
+
+def count_http(field, amount=1):
+    # Called on the request path of every OpenAI call, so it stays in process
+    with _http_lock:
+        _http_counts[field] += amount
+
+
+def _take_http_counts():
+    with _http_lock:
+        counts = dict(_http_counts)
+        _http_counts.clear()
+    return counts
+
+
+def get_http_counts():
+    """
+    Returns (requests, connections_opened) of the shared OpenAI HTTP pools.
+    """
+    # Includes this process's counts that no trace has flushed yet
+    record_histograms([])
+    try:
+        counts = get_redis().hgetall(HTTP_KEY)
+    except redis.RedisError:
+        return 0, 0
+    return int(counts.get("requests", 0)), int(counts.get("connections", 0))
+
+
+def record_usage(attributes, message):
+    """
+    Copies the token usage LangChain reports on a chat response (or final stream chunk).
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        attributes["input_tokens"] = attributes.get("input_tokens", 0) + usage.get("input_tokens", 0)
+        attributes["output_tokens"] = attributes.get("output_tokens", 0) + usage.get("output_tokens", 0)
+
+
+def flush(trace, db, sampler=None):
+    db.save_metrics(trace.trace_id, trace.operation, trace.interview_id, trace.spans)
+    if sampler is not None:
+        db.save_profile(trace.trace_id, trace.operation, sampler.samples, sampler.folded())
+    record_histograms(trace.spans)
+
+
+def evict_old_metrics(db):
+    """
+    Deletes metrics and profiles older than METRICS_RETENTION_DAYS, if no process did so in
+    the last METRICS_EVICT_INTERVAL seconds. Workers call this while idle.
+    Returns True if this call ran the eviction.
+    """
+    try:
+        if not get_redis().set(EVICT_KEY, 1, nx=True, ex=METRICS_EVICT_INTERVAL):
+            return False
+    except redis.RedisError:
+        return False
+    db.evict_metrics(METRICS_RETENTION_DAYS)
+    return True
+
+
+def record_histograms(spans):
+    """
+    Adds the spans to cumulative per-stage histograms in Redis, shared by every process,
+    along with the OpenAI HTTP counts gathered since the last call.
+    """
+    http_counts = _take_http_counts()
+    if not spans and not http_counts:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for stage, _, duration, error, attributes in spans:
+            key = f"metrics:stage:{stage}"
+            for bucket in BUCKETS:
+                if duration <= bucket:
+                    pipe.hincrby(key, f"le:{bucket}", 1)
+            pipe.hincrby(key, "count", 1)
+            pipe.hincrbyfloat(key, "sum", duration)
+            if error:
+                pipe.hincrby(key, "errors", 1)
+            for name in COUNTED_ATTRIBUTES:
+                if isinstance(attributes.get(name), (int, float)):
+                    pipe.hincrbyfloat(key, name, attributes[name])
+        if spans:
+            pipe.sadd(STAGES_KEY, *{s[0] for s in spans})
+        for field, amount in http_counts.items():
+            pipe.hincrby(HTTP_KEY, field, amount)
+        pipe.execute()
+    except redis.RedisError as e:
+        # Kept for the next flush
+        with _http_lock:
+            _http_counts.update(http_counts)
+        print(f"Error recording metrics: {e}")
+
+
+def render_prometheus():
+    """
+    Prometheus text exposition of the stage histograms and counters.
+    """
+    r = get_redis()
+    stages = sorted(r.smembers(STAGES_KEY))
+    pipe = r.pipeline(transaction=False)
+    for stage in stages:
+        pipe.hgetall(f"metrics:stage:{stage}")
+    values = dict(zip(stages, pipe.execute()))
+
+    lines = [
+        "# HELP jobby_stage_duration_seconds Duration of each interview pipeline stage.",
+        "# TYPE jobby_stage_duration_seconds histogram",
+    ]
+    for stage, fields in values.items():
+        for bucket in BUCKETS:
+            lines.append(f'jobby_stage_duration_seconds_bucket{{stage="{stage}",le="{bucket}"}} '
+                         f'{int(fields.get(f"le:{bucket}", 0))}')
+        lines.append(f'jobby_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {int(fields.get("count", 0))}')
+        lines.append(f'jobby_stage_duration_seconds_sum{{stage="{stage}"}} {float(fields.get("sum", 0))}')
+        lines.append(f'jobby_stage_duration_seconds_count{{stage="{stage}"}} {int(fields.get("count", 0))}')
+
+    lines += ["# HELP jobby_stage_errors_total Stages that raised an error.", "# TYPE jobby_stage_errors_total counter"]
+    lines += [f'jobby_stage_errors_total{{stage="{stage}"}} {int(fields.get("errors", 0))}'
+              for stage, fields in values.items()]
+
+    counters = {
+        "input_tokens": ("jobby_openai_input_tokens_total", "Prompt tokens sent to OpenAI."),
+        "output_tokens": ("jobby_openai_output_tokens_total", "Completion tokens received from OpenAI."),
+        "audio_seconds": ("jobby_audio_seconds_total", "Seconds of audio transcribed."),
+        "bytes": ("jobby_stage_bytes_total", "Bytes uploaded or written."),
+    }
+    for attribute, (name, help_text) in counters.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f'{name}{{stage="{stage}"}} {float(fields[attribute])}'
+                  for stage, fields in values.items() if attribute in fields]
+
+    http = r.hgetall(HTTP_KEY)
+    lines += [
+        "# HELP jobby_openai_http_requests_total Requests sent through the shared OpenAI HTTP pools.",
+        "# TYPE jobby_openai_http_requests_total counter",
+        f"jobby_openai_http_requests_total {int(http.get('requests', 0))}",
+        "# HELP jobby_openai_http_connections_total Connections those pools opened (the rest were reused).",
+        "# TYPE jobby_openai_http_connections_total counter",
+        f"jobby_openai_http_connections_total {int(http.get('connections', 0))}",
+    ]
+
+    # Written by TranscriptionCache and AnalysisCache
+    lines += [
+        "# HELP jobby_cache_lookups_total Transcription and analysis cache lookups, by the tier that answered.",
+        "# TYPE jobby_cache_lookups_total counter",
+    ]
+    for cache in ("transcription", "analysis"):
+        lines += [f'jobby_cache_lookups_total{{cache="{cache}",result="{result}"}} {int(count)}'
+                  for result, count in sorted(r.hgetall(f"{cache}_cache:stats").items())]
+
+    lines += [
+        "# HELP jobby_jobs_pending Upload jobs waiting for a worker.",
+        "# TYPE jobby_jobs_pending gauge",
+        f"jobby_jobs_pending {r.llen('jobs:pending')}",
+        "# HELP jobby_jobs_processing Upload jobs being processed.",
+        "# TYPE jobby_jobs_processing gauge",
+        f"jobby_jobs_processing {r.llen('jobs:processing')}",
+        "# HELP jobby_jobs_dead Upload jobs given up on after repeatedly stopping their worker.",
+        "# TYPE jobby_jobs_dead gauge",
+        f"jobby_jobs_dead {r.llen('jobs:dead')}",
+    ]
+    return "\n".join(lines) + "\n"
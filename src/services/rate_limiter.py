@@ -0,0 +1,230 @@
+import asyncio
+import os
+import random
+import re
+import time
+import redis
+from redis_client import get_redis
+
+# Requests and tokens per minute per resource; override with RATE_LIMIT_<RESOURCE>_RPM / _TPM
+DEFAULT_LIMITS = {
+    "whisper": {"rpm": 50, "tpm": 0},
+    "chat": {"rpm": 500, "tpm": 30000},
+}
+
+# Share of each bucket that bulk work may not touch, so interactive requests always find room
+PRIORITY_RESERVE = {"interactive": 0.0, "bulk": 0.2}
+
+
+def retryable_errors():
+    # Only evaluated once a call has raised, so openai is never imported just for this module
+    import openai
+
+    return (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+
+# Refills both buckets, then takes one request and `cost` tokens if the caller's lane allows it.
+# Returns "0" when granted, otherwise the number of seconds to wait.
+ACQUIRE_SCRIPT = """
+local cooldown = redis.call('PTTL', KEYS[3])
+if cooldown > 0 then
+    return tostring(cooldown / 1000)
+end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local rpm, tpm = tonumber(ARGV[1]), tonumber(ARGV[2])
+local cost, reserve = tonumber(ARGV[3]), tonumber(ARGV[4])
+
+local function refill(key, capacity)
+    local bucket = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    return math.min(capacity, level + (now - ts) * capacity / 60)
+end
+
+local wait = 0
+local requests = refill(KEYS[1], rpm)
+local needed = math.min(rpm, 1 + reserve * rpm)
+if requests < needed then
+    wait = math.max(wait, (needed - requests) * 60 / rpm)
+end
+
+local tokens = 0
+if tpm > 0 then
+    cost = math.min(cost, tpm)
+    tokens = refill(KEYS[2], tpm)
+    needed = math.min(tpm, cost + reserve * tpm)
+    if tokens < needed then
+        wait = math.max(wait, (needed - tokens) * 60 / tpm)
+    end
+end
+
+if wait > 0 then
+    return tostring(wait)
+end
+
+redis.call('HSET', KEYS[1], 'level', requests - 1, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+if tpm > 0 then
+    redis.call('HSET', KEYS[2], 'level', tokens - cost, 'ts', now)
+    redis.call('EXPIRE', KEYS[2], 120)
+end
+return '0'
+"""
+
+# Completion tokens reserved per chat request, on top of the prompt
+OUTPUT_TOKEN_ESTIMATE = int(os.getenv("OPENAI_OUTPUT_TOKEN_ESTIMATE", "2000"))
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+def estimate_chat_tokens(messages):
+    """
+    Cheap upper-bound guess of a chat request's token usage (~4 characters per token).
+    """
+    return sum(len(message.content) for message in messages) // 4 + OUTPUT_TOKEN_ESTIMATE
+
+
+def parse_reset_duration(value):
+    """
+    Parses OpenAI reset headers such as "20ms", "1.5s" or "6m0s" into seconds.
+    """
+    if not value:
+        return None
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_delay_from_headers(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    delays = [
+        parse_reset_duration(headers.get(name))
+        for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    delays = [d for d in delays if d is not None]
+    return max(delays) if delays else None
+
+
+class RateGovernor:
+    """
+    Client-side limiter shared by every process through Redis: one token bucket for
+    requests and one for tokens per minute per resource, with priority lanes and a
+    shared cooldown after a 429. Without Redis it only retries with backoff.
+    """
+
+    def __init__(self):
+        self.r = get_redis()
+        self.acquire_script = self.r.register_script(ACQUIRE_SCRIPT)
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", "6"))
+        self.base_delay = float(os.getenv("OPENAI_BACKOFF_BASE", "1"))
+        self.max_delay = float(os.getenv("OPENAI_BACKOFF_MAX", "60"))
+        self.max_queue_wait = float(os.getenv("OPENAI_MAX_QUEUE_WAIT", "300"))
+
+    def _limits(self, resource):
+        limits = DEFAULT_LIMITS[resource]
+        return (
+            int(os.getenv(f"RATE_LIMIT_{resource.upper()}_RPM", limits["rpm"])),
+            int(os.getenv(f"RATE_LIMIT_{resource.upper()}_TPM", limits["tpm"])),
+        )
+
+    def _try_acquire(self, resource, tokens, priority):
+        """
+        Returns 0 if the request may go now, else seconds to wait before trying again.
+        """
+        rpm, tpm = self._limits(resource)
+        try:
+            return float(self.acquire_script(
+                keys=[f"ratelimit:{resource}:requests", f"ratelimit:{resource}:tokens", f"ratelimit:{resource}:cooldown"],
+                args=[rpm, tpm, tokens, PRIORITY_RESERVE.get(priority, 0.0)],
+            ))
+        except redis.RedisError:
+            return 0.0
+
+    def _cool_down(self, resource, delay):
+        try:
+            self.r.set(f"ratelimit:{resource}:cooldown", 1, px=max(1, int(delay * 1000)))
+        except redis.RedisError:
+            pass
+
+    def _backoff(self, resource, error, attempt):
+        # Full jitter around an exponential curve, never shorter than what the API asked for
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+        header_delay = retry_delay_from_headers(error)
+        if header_delay is not None:
+            delay = max(delay, header_delay)
+        import openai
+
+        if isinstance(error, openai.RateLimitError):
+            # Make every replica pause, not just the one that got the 429
+            self._cool_down(resource, header_delay or delay)
+        return delay
+
+    def _give_up(self, error):
+        import openai
+
+        if isinstance(error, openai.RateLimitError):
+            raise RateLimitExceeded("OpenAI rate limit reached. Please try again in a minute.") from error
+        raise error
+
+    def acquire(self, resource, tokens=0, priority="interactive"):
+        deadline = time.monotonic() + self.max_queue_wait
+        while True:
+            wait = self._try_acquire(resource, tokens, priority)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded("OpenAI is busy right now. Please try again in a minute.")
+            time.sleep(min(wait, 5) * random.uniform(1.0, 1.2))
+
+    def call(self, resource, func, tokens=0, priority="interactive"):
+        for attempt in range(self.max_retries + 1):
+            self.acquire(resource, tokens, priority)
+            try:
+                return func()
+            except retryable_errors() as e:
+                if attempt == self.max_retries:
+                    self._give_up(e)
+                time.sleep(self._backoff(resource, e, attempt))
+
+    def stream(self, resource, make_stream, tokens=0, priority="interactive"):
+        """
+        Like call() for generators; only retries if nothing was yielded yet.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(resource, tokens, priority)
+            started = False
+            try:
+                for item in make_stream():
+                    started = True
+                    yield item
+                return
+            except retryable_errors() as e:
+                if started or attempt == self.max_retries:
+                    self._give_up(e)
+                time.sleep(self._backoff(resource, e, attempt))
+
+    async def acall(self, resource, make_coroutine, tokens=0, priority="interactive"):
+        for attempt in range(self.max_retries + 1):
+            await asyncio.to_thread(self.acquire, resource, tokens, priority)
+            try:
+                return await make_coroutine()
+            except retryable_errors() as e:
+                if attempt == self.max_retries:
+                    self._give_up(e)
+                await asyncio.sleep(self._backoff(resource, e, attempt))
@@ -0,0 +1,116 @@
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from services import metrics
+from services.analysis_cache import analysis_cache_key
+
+SECTION_HEADING = re.compile(r"^\s*#+\s*(.+?)\s*:?\s*$")
+SECTION_ITEM = re.compile(r"^\s*[-*]\s*([^:]{1,80}):\s*(.*?)\s*,?\s*$")
+
+SECTION_INSTRUCTIONS = """
+Write ONLY the following section of the analysis, as markdown, without repeating its title:
+{name} ({heading}): {description}"""
+
+Section = namedtuple("Section", ["heading", "name", "description"])
+
+
+def parse_sections(prompt):
+    """
+    Splits an analysis prompt into its preamble and the "- Name: description"
+    items listed under its markdown headings.
+    """
+    preamble, sections, heading = [], [], None
+    for line in prompt.splitlines():
+        heading_match = SECTION_HEADING.match(line)
+        if heading_match:
+            heading = heading_match.group(1)
+            continue
+        item_match = SECTION_ITEM.match(line)
+        if heading is not None and item_match:
+            sections.append(Section(heading, item_match.group(1).strip(), item_match.group(2)))
+        elif heading is None:
+            preamble.append(line)
+        elif sections and line.strip():
+            last = sections[-1]
+            sections[-1] = last._replace(description=f"{last.description} {line.strip()}")
+    return "\n".join(preamble).strip(), sections
+
+
+class SectionAnalyzer:
+    """
+    Generates each section of the analysis prompt as its own concurrent request and
+    caches results per section, so editing one section of the prompt only regenerates
+    that section. The first run sends the transcript once per section; re-analyses
+    after small prompt edits are where this saves time and tokens.
+    """
+
+    def __init__(self, llm_service, cache, concurrency):
+        self.llm_service = llm_service
+        self.cache = cache
+        self.concurrency = concurrency
+
+    def supports(self, transcription, prompt):
+        _, sections = parse_sections(prompt)
+        return len(sections) > 1 and not self.llm_service.needs_map_reduce(transcription)
+
+    def _section_prompt(self, preamble, section):
+        return preamble + SECTION_INSTRUCTIONS.format(
+            name=section.name, heading=section.heading, description=section.description
+        )
+
+    def _section_requests(self, transcription, prompt, model):
+        """
+        Returns (section, section_prompt, cache_key) for every section of `prompt`.
+        """
+        preamble, sections = parse_sections(prompt)
+        requests = []
+        for section in sections:
+            section_prompt = self._section_prompt(preamble, section)
+            cache_key = analysis_cache_key(transcription, section_prompt, model, self.llm_service.analysis_temperature)
+            requests.append((section, section_prompt, cache_key))
+        return requests
+
+    def cache_keys(self, transcription, prompt, model):
+        """
+        The cache keys of the sections `model` generated for this transcript and prompt.
+        """
+        return [cache_key for _, _, cache_key in self._section_requests(transcription, prompt, model)]
+
+    def _generate(self, transcription, section_prompt, cache_key):
+        text = self.llm_service.analyze_interview(transcription, section_prompt)
+        self.cache.put(cache_key, text)
+        return text
+
+    def stream(self, transcription, prompt):
+        """
+        Yields the assembled markdown report section by section, in prompt order,
+        as soon as each section (and every one before it) is available.
+        """
+        requests = self._section_requests(transcription, prompt, self.llm_service.analysis_model)
+        sections = [section for section, _, _ in requests]
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            results = []
+            # Counted per call on the span: the analyzer is shared by every session
+            with metrics.span("section_cache_lookup", reused=0, regenerated=0) as attributes:
+                for section, section_prompt, cache_key in requests:
+                    cached = self.cache.get(cache_key)
+                    if cached is not None:
+                        attributes["reused"] += 1
+                        results.append(cached)
+                    else:
+                        attributes["regenerated"] += 1
+                        results.append(
+                            executor.submit(metrics.bind(self._generate), transcription, section_prompt, cache_key)
+                        )
+
+            heading = None
+            for section, result in zip(sections, results):
+                if section.heading != heading:
+                    heading = section.heading
+                    yield f"# {heading}\n\n"
+                text = result if isinstance(result, str) else result.result()
+                yield f"## {section.name}\n\n{text.strip()}\n\n"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
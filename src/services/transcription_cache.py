@@ -0,0 +1,112 @@
+import hashlib
+import os
+import redis
+from redis_client import get_redis
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_audio(buffer):
+    """
+    SHA-256 of the uploaded bytes, fed block by block from a memoryview so the
+    upload buffer is never copied.
+    """
+    view = memoryview(buffer).cast("B")
+    digest = hashlib.sha256()
+    for offset in range(0, len(view), HASH_BLOCK_SIZE):
+        digest.update(view[offset:offset + HASH_BLOCK_SIZE])
+    return digest.hexdigest()
+
+
+def hash_file(file_path):
+    """
+    SHA-256 of a file on disk, read block by block; matches hash_audio of the same bytes.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """
+    Content-addressed transcription cache: Postgres is the persistent tier,
+    Redis an optional front with a TTL. Hit/miss counters live in Redis so
+    every app and worker process reports the same numbers.
+    """
+
+    stats_key = "transcription_cache:stats"
+
+    def __init__(self, db):
+        self.db = db
+        self.r = get_redis()
+        self.redis_ttl = int(os.getenv("TRANSCRIPTION_CACHE_REDIS_TTL", "86400"))
+        self.max_age_days = int(os.getenv("TRANSCRIPTION_CACHE_MAX_AGE_DAYS", "90"))
+
+    def _redis_key(self, audio_hash):
+        return f"transcription_cache:{audio_hash}"
+
+    def _count(self, field):
+        try:
+            self.r.hincrby(self.stats_key, field, 1)
+        except redis.RedisError:
+            pass
+
+    def get(self, audio_hash):
+        try:
+            text = self.r.get(self._redis_key(audio_hash))
+            if text is not None:
+                self._count("redis_hits")
+                return text
+        except redis.RedisError:
+            pass
+
+        text = self.db.get_cached_transcription(audio_hash)
+        if text is None:
+            self._count("misses")
+            return None
+
+        self._count("db_hits")
+        try:
+            self.r.setex(self._redis_key(audio_hash), self.redis_ttl, text)
+        except redis.RedisError:
+            pass
+        return text
+
+    def put(self, audio_hash, text):
+        self.db.save_cached_transcription(audio_hash, text)
+        try:
+            self.r.setex(self._redis_key(audio_hash), self.redis_ttl, text)
+        except redis.RedisError:
+            pass
+        # Writes happen once per real transcription, so evicting here keeps
+        # the table bounded without a separate scheduler.
+        self.db.evict_cached_transcriptions(self.max_age_days)
+
+    def forget(self, audio_hashes):
+        """
+        Drops entries from the Redis front (their rows are deleted with the interview).
+        """
+        if not audio_hashes:
+            return
+        try:
+            self.r.delete(*(self._redis_key(audio_hash) for audio_hash in audio_hashes))
+        except redis.RedisError:
+            pass
+
+    def stats(self):
+        try:
+            raw = self.r.hgetall(self.stats_key)
+        except redis.RedisError:
+            raw = {}
+        redis_hits = int(raw.get("redis_hits", 0))
+        db_hits = int(raw.get("db_hits", 0))
+        misses = int(raw.get("misses", 0))
+        total = redis_hits + db_hits + misses
+        return {
+            "redis_hits": redis_hits,
+            "db_hits": db_hits,
+            "misses": misses,
+            "hit_rate": (redis_hits + db_hits) / total if total else 0.0,
+        }
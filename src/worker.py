@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from services import metrics
+from services.interview_orchestrator import InterviewOrchestrator
+from services.job_queue import JobQueue
+
+HEARTBEAT_INTERVAL = 15
+# How often each worker makes sure the coming months' interview partitions exist
+PARTITION_CHECK_INTERVAL = float(os.getenv("INTERVIEW_PARTITION_CHECK_SECONDS", "3600"))
+
+
+def heartbeat_loop(queue, job_id, stop_event):
+    while not stop_event.wait(HEARTBEAT_INTERVAL):
+        try:
+            queue.heartbeat(job_id)
+        except Exception as e:
+            print(f"Heartbeat failed for job {job_id}: {e}")
+
+
+def process_job(orchestrator, queue, job_id, payload):
+    stop_event = threading.Event()
+    heartbeat = threading.Thread(target=heartbeat_loop, args=(queue, job_id, stop_event), daemon=True)
+    heartbeat.start()
+
+    def on_progress(status, progress, **details):
+        queue.update(job_id, status, progress, **details)
+
+    upload = None
+    try:
+        # A retried job whose interview was already saved only needs its analysis
+        saved_interview_id = (queue.get(job_id) or {}).get("interview_id")
+        if saved_interview_id:
+            interview_id = orchestrator.resume_upload(
+                saved_interview_id,
+                payload["system_prompt"],
+                on_progress=on_progress,
+                profile=payload.get("profile"),
+            )
+        else:
+            upload = orchestrator.load_job_upload(job_id, payload)
+            interview_id = orchestrator.process_upload(
+                upload,
+                payload["system_prompt"],
+                on_progress=on_progress,
+                audio_hash=payload.get("audio_hash"),
+                profile=payload.get("profile"),
+            )
+        queue.complete(job_id, interview_id)
+        print(f"Job {job_id} done: interview {interview_id}")
+    except Exception as e:
+        print(f"Job {job_id} failed: {e}")
+        queue.fail(job_id, str(e))
+    finally:
+        stop_event.set()
+        queue.delete_audio(job_id)
+        if upload is not None:
+            upload.cleanup()
+        if payload.get("file_path") and os.path.exists(payload["file_path"]):
+            os.remove(payload["file_path"])
+
+
+def run_worker(worker_index):
+    """
+    Worker process loop: pulls jobs from Redis and runs them one at a time.
+    """
+    orchestrator = InterviewOrchestrator()
+    queue = JobQueue()
+    try:
+        orchestrator.llm_service.warm()
+    except Exception as e:
+        print(f"Worker {worker_index} could not prepare the OpenAI clients: {e}")
+    print(f"Worker {worker_index} started (pid {os.getpid()})")
+
+    next_partition_check = time.monotonic() + PARTITION_CHECK_INTERVAL
+    while True:
+        try:
+            if time.monotonic() >= next_partition_check:
+                next_partition_check = time.monotonic() + PARTITION_CHECK_INTERVAL
+                created = orchestrator.db.create_interview_partitions()
+                if created:
+                    print(f"Worker {worker_index} created partitions {', '.join(created)}")
+            job = queue.dequeue(timeout=5)
+            if job is None:
+                requeued = queue.requeue_stale()
+                if requeued:
+                    print(f"Worker {worker_index} requeued {requeued} stale job(s)")
+                metrics.evict_old_metrics(orchestrator.db)
+                continue
+            process_job(orchestrator, queue, *job)
+        except Exception as e:
+            # Redis hiccups should not kill the worker; back off and retry.
+            print(f"Worker {worker_index} error: {e}")
+            time.sleep(5)
+
+
+def main():
+    num_workers = int(os.getenv("JOB_WORKERS", "2"))
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(i,), daemon=True)
+        for i in range(num_workers)
+    ]
+    for p in processes:
+        p.start()
+
+    def shutdown(signum, frame):
+        for p in processes:
+            p.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for p in processes:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    Points get_redis at an in-memory fakeredis server (with Lua support), for the given modules.
+    """
+    import fakeredis
+
+    server = fakeredis.FakeServer()
+
+    def get_redis(decode_responses=True):
+        return fakeredis.FakeRedis(server=server, decode_responses=decode_responses)
+
+    def patch(*modules):
+        for module in modules:
+            monkeypatch.setattr(module, "get_redis", get_redis)
+        return get_redis()
+
+    return patch
@@ -0,0 +1,96 @@
+import pytest
+
+from services import metrics
+from services.interview_orchestrator import InterviewOrchestrator
+
+
+class FakeDatabase:
+    def __init__(self, saved=True):
+        self.saved = saved
+        self.versions = []
+
+    def save_analysis_versions(self, interview_id, versions, make_current=False):
+        if not self.saved:
+            return None
+        self.versions.extend(versions)
+        return list(range(len(self.versions) - len(versions) + 1, len(self.versions) + 1))
+
+    def update_analysis(self, interview_id, analysis_text, analysis_prompt):
+        pass
+
+    def save_metrics(self, trace_id, operation, interview_id, spans):
+        pass
+
+    def evict_metrics(self, retention_days):
+        pass
+
+
+class FakeLLMService:
+    analysis_model = "model"
+    analysis_temperature = 0
+
+    def analyze_interview(self, transcription_text, prompt):
+        return f"analysis of {prompt}"
+
+    def stream_analysis(self, transcription_text, prompt):
+        yield "analysis "
+        yield f"of {prompt}"
+
+    async def analyze_interviews(self, transcription_text, prompts):
+        return [f"analysis of {prompt}" for prompt in prompts]
+
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, value):
+        self.entries[key] = value
+
+
+def make_orchestrator(saved):
+    orchestrator = InterviewOrchestrator.__new__(InterviewOrchestrator)
+    orchestrator.db = FakeDatabase(saved)
+    orchestrator.llm_service = FakeLLMService()
+    orchestrator.analysis_cache = DictCache()
+    orchestrator.analysis_mode = "single"
+    orchestrator.checkpoint_seconds = 60
+    return orchestrator
+
+
+@pytest.fixture(autouse=True)
+def redis(fake_redis):
+    return fake_redis(metrics)
+
+
+def test_reanalyze_saves_a_new_version():
+    orchestrator = make_orchestrator(saved=True)
+    assert orchestrator.reanalyze_interview(1, "transcript", "p") == "analysis of p"
+    assert orchestrator.db.versions == [("p", "model", "analysis of p")]
+
+
+def test_reanalyze_fails_when_the_analysis_is_not_saved():
+    orchestrator = make_orchestrator(saved=False)
+    with pytest.raises(RuntimeError, match="could not be saved"):
+        orchestrator.reanalyze_interview(1, "transcript", "p")
+
+
+def test_stream_analysis_fails_when_the_analysis_is_not_saved():
+    orchestrator = make_orchestrator(saved=False)
+    with pytest.raises(RuntimeError, match="could not be saved"):
+        "".join(orchestrator.stream_analysis(1, "transcript", "p"))
+
+
+def test_analyze_prompts_returns_version_ids():
+    orchestrator = make_orchestrator(saved=True)
+    results = orchestrator.analyze_prompts(1, "transcript", ["a", "b"])
+    assert results == [(1, "a", "analysis of a"), (2, "b", "analysis of b")]
+
+
+def test_analyze_prompts_marks_unsaved_results():
+    orchestrator = make_orchestrator(saved=False)
+    results = orchestrator.analyze_prompts(1, "transcript", ["a", "b"])
+    assert results == [(None, "a", "analysis of a"), (None, "b", "analysis of b")]
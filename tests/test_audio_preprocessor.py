@@ -0,0 +1,57 @@
+import os
+
+from services import audio_preprocessor, audio_upload
+from services.audio_preprocessor import (
+    PREPROCESS_MIN_BYTES,
+    AudioPreprocessor,
+    build_timestamp_map,
+    keep_intervals,
+    to_original_time,
+)
+from services.audio_upload import AudioUpload
+
+
+def test_long_silences_are_shortened():
+    intervals = keep_intervals(10.0, [(2.0, 5.0), (6.0, 6.5)], min_silence=1.0, keep_silence=0.4)
+    assert intervals == [(0.0, 2.2), (4.8, 10.0)]
+
+
+def test_without_silences_everything_is_kept():
+    assert keep_intervals(10.0, []) == [(0.0, 10.0)]
+
+
+def test_processed_times_map_back_to_the_original():
+    timestamp_map = build_timestamp_map([(0.0, 2.2), (4.8, 10.0)])
+    assert timestamp_map == [(0.0, 0.0, 2.2), (2.2, 4.8, 10.0)]
+    assert to_original_time(timestamp_map, 1.0) == 1.0
+    assert to_original_time(timestamp_map, 3.2) == 5.8
+    assert to_original_time(timestamp_map, 100.0) == 10.0
+    assert to_original_time([], 3.2) == 3.2
+
+
+def test_uploads_in_memory_are_spilled_once_for_preprocessing(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_preprocessor, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(audio_upload, "UPLOAD_DIR", str(tmp_path))
+    inputs = []
+
+    def run(input_path, output_path):
+        inputs.append(input_path)
+        with open(output_path, "wb") as f:
+            f.write(b"opus")
+        return {
+            "original_bytes": os.path.getsize(input_path), "processed_bytes": 4,
+            "original_seconds": 10.0, "processed_seconds": 8.0,
+            "timestamp_map": [(0.0, 0.0, 10.0)], "elapsed_seconds": 0.1,
+        }
+
+    upload = AudioUpload("interview.mp3", buffer=bytes(PREPROCESS_MIN_BYTES + 1))
+    preprocessor = AudioPreprocessor(db=None)
+    preprocessor.enabled = True
+    monkeypatch.setattr(preprocessor, "_run", run)
+
+    prepared = preprocessor.prepare(upload)
+    assert prepared.report["timestamp_map"] == [(0.0, 0.0, 10.0)]
+    assert inputs == [upload.path]
+    prepared.cleanup()
+    upload.cleanup()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,46 @@
+from services.audio_segmenter import merge_transcripts, plan_segments
+
+
+def test_short_recording_is_one_segment():
+    assert plan_segments(300, [], chunk_seconds=600, overlap_seconds=2) == [(0.0, 300)]
+
+
+def test_segments_overlap_and_cover_the_recording():
+    segments = plan_segments(1500, [], chunk_seconds=600, overlap_seconds=2)
+
+    assert segments == [(0.0, 602.0), (600.0, 1202.0), (1200.0, 1500)]
+
+
+def test_cut_moves_back_to_last_silence_near_the_target():
+    silences = [(100, 101), (530, 532), (560, 562), (700, 705)]
+
+    segments = plan_segments(1000, silences, chunk_seconds=600, overlap_seconds=2)
+
+    # 561 is the last silence midpoint within the final 20% (480-600) of the first chunk
+    assert segments[0] == (0.0, 563.0)
+    assert segments[1][0] == 561.0
+    assert segments[-1][1] == 1000
+
+
+def test_tail_shorter_than_overlap_is_not_a_segment_of_its_own():
+    segments = plan_segments(601, [], chunk_seconds=600, overlap_seconds=2)
+
+    assert segments == [(0.0, 601)]
+
+
+def test_merge_drops_words_repeated_in_the_overlap():
+    texts = ["So tell me about your last role. I led the", "I led the platform team for two years."]
+
+    assert merge_transcripts(texts) == "So tell me about your last role. I led the platform team for two years."
+
+
+def test_merge_ignores_case_and_punctuation_in_the_overlap():
+    texts = ["we shipped it on time,", "We shipped it on time and under budget"]
+
+    assert merge_transcripts(texts) == "we shipped it on time, and under budget"
+
+
+def test_merge_keeps_text_without_a_real_overlap():
+    # A single repeated word isn't evidence of overlap
+    assert merge_transcripts(["yes", "yes indeed"]) == "yes yes indeed"
+    assert merge_transcripts(["first part", "second part"]) == "first part second part"
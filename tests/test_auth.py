@@ -0,0 +1,75 @@
+import pytest
+
+import auth
+from auth import AuthService
+
+
+@pytest.fixture
+def service(fake_redis, monkeypatch):
+    fake_redis(auth)
+    monkeypatch.setenv("LOGIN_USER", "admin")
+    monkeypatch.setenv("LOGIN_PASSWORD", "secret")
+    monkeypatch.setenv("LOGIN_MAX_FAILURES", "3")
+    monkeypatch.setenv("LOGIN_MAX_FAILURES_PER_CLIENT", "5")
+    monkeypatch.setenv("LOGIN_LOCK_SECONDS", "30")
+    return AuthService()
+
+
+def test_correct_credentials_log_in(service):
+    assert service.attempt_login("10.0.0.1", "admin", "secret") == ("ok", 0)
+
+
+def test_failures_count_down_then_lock_the_client_and_username(service):
+    assert service.attempt_login("10.0.0.1", "admin", "wrong") == ("failed", 2)
+    assert service.attempt_login("10.0.0.1", "admin", "wrong") == ("failed", 1)
+    assert service.attempt_login("10.0.0.1", "admin", "wrong") == ("locked_now", 30)
+    status, ttl = service.attempt_login("10.0.0.1", "admin", "secret")
+    assert status == "locked" and 0 < ttl <= 30
+
+
+def test_a_success_clears_the_failures(service):
+    service.attempt_login("10.0.0.1", "admin", "wrong")
+    service.attempt_login("10.0.0.1", "admin", "wrong")
+    assert service.attempt_login("10.0.0.1", "admin", "secret") == ("ok", 0)
+    assert service.attempt_login("10.0.0.1", "admin", "wrong") == ("failed", 2)
+
+
+def test_a_locked_client_does_not_lock_out_others(service):
+    for _ in range(3):
+        service.attempt_login("10.0.0.1", "admin", "wrong")
+    assert service.attempt_login("10.0.0.2", "admin", "secret") == ("ok", 0)
+
+
+def test_failures_across_usernames_lock_the_client(service):
+    for i in range(4):
+        status, _ = service.attempt_login("10.0.0.1", f"user{i}", "wrong")
+        assert status == "failed"
+    assert service.attempt_login("10.0.0.1", "user4", "wrong") == ("locked_now", 30)
+    assert service.attempt_login("10.0.0.1", "admin", "secret")[0] == "locked"
+
+
+def test_missing_credentials_are_reported(service, monkeypatch):
+    monkeypatch.delenv("LOGIN_PASSWORD")
+    with pytest.raises(ValueError):
+        service.attempt_login("10.0.0.1", "admin", "secret")
+
+
+class FakeContext:
+    def __init__(self, headers, ip_address=None):
+        self.headers = headers
+        self.ip_address = ip_address
+
+
+def test_client_id_without_an_address_falls_back_to_the_forwarded_header(monkeypatch):
+    monkeypatch.setattr(auth.st, "context", FakeContext({"X-Forwarded-For": "10.0.0.1, 10.0.0.2"}))
+    assert auth.get_client_id() == "10.0.0.1"
+
+
+def test_clients_without_any_address_get_their_own_id(monkeypatch):
+    monkeypatch.setattr(auth.st, "context", FakeContext({}))
+    monkeypatch.setattr(auth.st, "session_state", {})
+    first = auth.get_client_id()
+    assert first == auth.get_client_id()
+
+    monkeypatch.setattr(auth.st, "session_state", {})
+    assert auth.get_client_id() != first
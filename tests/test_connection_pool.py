@@ -0,0 +1,44 @@
+import pytest
+
+import database
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+
+    def connect(**kwargs):
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(database.psycopg2, "connect", connect)
+    monkeypatch.setattr(database, "_pool", None)
+    monkeypatch.setenv("DB_POOL_MIN", "3")
+    return opened
+
+
+def test_failed_schema_setup_closes_the_pool(connections, monkeypatch):
+    def init_db(pool):
+        raise RuntimeError("permission denied")
+
+    monkeypatch.setattr(database, "init_db", init_db)
+    assert database.get_pool() is None
+    assert database.get_pool() is None
+    assert len(connections) == 6
+    assert all(conn.closed for conn in connections)
+
+
+def test_pool_is_kept_once_the_schema_is_ready(connections, monkeypatch):
+    monkeypatch.setattr(database, "init_db", lambda pool: None)
+    pool = database.get_pool()
+    assert pool is database.get_pool()
+    assert pool.stats()["open"] == 3
+    assert not any(conn.closed for conn in connections)
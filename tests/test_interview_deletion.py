@@ -0,0 +1,70 @@
+import pytest
+
+from services import analysis_cache, transcription_cache
+from services.analysis_cache import AnalysisCache, analysis_cache_key
+from services.interview_orchestrator import InterviewOrchestrator
+from services.section_analyzer import SectionAnalyzer
+from services.transcription_cache import TranscriptionCache
+
+
+class FakeDatabase:
+    def __init__(self, deleted=True):
+        self.deleted = deleted
+        self.purged_keys = None
+
+    def get_interview_field(self, interview_id, field):
+        return "transcript"
+
+    def get_analysis_versions(self, interview_id):
+        return [
+            (1, "h1", "p", "model", None, 10),
+            (2, "h2", "## Report\n- A: first\n- B: second", "model/sections", None, 20),
+        ]
+
+    def delete_interview(self, interview_id, analysis_cache_keys=()):
+        if not self.deleted:
+            return None
+        self.purged_keys = analysis_cache_keys
+        return ["audio"]
+
+
+class FakeLLMService:
+    analysis_model = "model"
+    analysis_temperature = 0
+
+
+def make_orchestrator(deleted=True):
+    orchestrator = InterviewOrchestrator.__new__(InterviewOrchestrator)
+    orchestrator.db = FakeDatabase(deleted)
+    orchestrator.llm_service = FakeLLMService()
+    orchestrator.transcription_cache = TranscriptionCache(orchestrator.db)
+    orchestrator.analysis_cache = AnalysisCache(orchestrator.db)
+    orchestrator.section_analyzer = SectionAnalyzer(orchestrator.llm_service, orchestrator.analysis_cache, 1)
+    return orchestrator
+
+
+@pytest.fixture(autouse=True)
+def redis(fake_redis):
+    return fake_redis(analysis_cache, transcription_cache)
+
+
+def test_delete_purges_the_interviews_cache_entries(redis):
+    orchestrator = make_orchestrator()
+    section_keys = orchestrator.section_analyzer.cache_keys("transcript", "## Report\n- A: first\n- B: second", "model")
+    single_key = analysis_cache_key("transcript", "p", "model", 0)
+    for key in [single_key, *section_keys]:
+        orchestrator.analysis_cache.memory.put(key, "cached")
+    redis.set("transcription_cache:audio", "transcript")
+
+    assert orchestrator.delete_interview(1)
+    assert len(section_keys) == 2
+    assert set(orchestrator.db.purged_keys) >= {single_key, *section_keys}
+    assert all(orchestrator.analysis_cache.memory.get(key) is None for key in [single_key, *section_keys])
+    assert redis.get("transcription_cache:audio") is None
+
+
+def test_failed_delete_keeps_the_cache(redis):
+    orchestrator = make_orchestrator(deleted=False)
+    redis.set("transcription_cache:audio", "transcript")
+    assert not orchestrator.delete_interview(1)
+    assert redis.get("transcription_cache:audio") == "transcript"
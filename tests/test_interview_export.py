@@ -0,0 +1,58 @@
+import io
+import os
+import sys
+import time
+
+import pytest
+
+import export_interviews
+from services import interview_export
+
+
+class FakeBatches:
+    def __init__(self, batches):
+        self.batches = iter(batches)
+        self.closed = False
+
+    def __iter__(self):
+        return self.batches
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDatabase:
+    def __init__(self, batches):
+        self.batches = FakeBatches(batches)
+
+    def iter_export_batches(self, batch_size, include_versions):
+        return self.batches
+
+
+def test_ndjson_export_writes_one_line_per_interview():
+    db = FakeDatabase([[(1, "a.mp3", None, None, "p", "t", "x", None)], [(2, "b.mp3", None, None, "p", "t", "y", None)]])
+    out = io.BytesIO()
+    assert interview_export.export_interviews(db, out) == 2
+    assert len(out.getvalue().splitlines()) == 2
+    assert db.batches.closed
+
+
+def test_stale_exports_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(interview_export, "EXPORT_DIR", str(tmp_path))
+    stale = interview_export.new_export_file()
+    stale.close()
+    old = time.time() - 7200
+    os.utime(stale.name, (old, old))
+
+    fresh = interview_export.new_export_file()
+    fresh.close()
+    assert not os.path.exists(stale.name)
+    assert os.path.exists(fresh.name)
+    assert interview_export.remove_stale_exports(max_age=3600) == 0
+
+
+def test_parquet_to_stdout_is_rejected(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["export_interviews.py", "-", "--format", "parquet"])
+    with pytest.raises(SystemExit):
+        export_interviews.parse_args()
+    assert "stdout" in capsys.readouterr().err
@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from database import Database, _escape_like
+
+START = datetime(2026, 1, 1)
+# (id, audio_filename, created_at); ids 3 and 4 share a timestamp, so only the id orders them
+ROWS = [(i, f"interview-{i}.mp3", START + timedelta(days=min(i, 3))) for i in range(1, 8)]
+
+
+class FakeCursor:
+    """
+    Answers the listing query from ROWS, applying the keyset condition and limit it was given.
+    """
+
+    def __init__(self, executed):
+        self.executed = executed
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params):
+        self.executed.append((query, params))
+        *params, limit = params
+        rows = sorted(ROWS, key=lambda row: (row[2], row[0]), reverse=True)
+        if "(created_at, id) <" in query:
+            created_at, interview_id = params[-2:]
+            rows = [row for row in rows if (row[2], row[0]) < (created_at, interview_id)]
+        self.rows = rows[:limit]
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakePool:
+    def __init__(self):
+        self.executed = []
+
+    @contextmanager
+    def connection(self):
+        conn = self
+
+        class Conn:
+            def cursor(self):
+                return FakeCursor(conn.executed)
+
+        yield Conn()
+
+
+def make_db():
+    db = Database.__new__(Database)
+    db.pool = FakePool()
+    return db
+
+
+def test_pages_follow_the_keyset_cursor_without_gaps_or_repeats():
+    db = make_db()
+    seen, cursor = [], None
+    while True:
+        rows, cursor = db.list_interviews(limit=3, cursor=cursor)
+        seen.extend(row[0] for row in rows)
+        if cursor is None:
+            break
+
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_cursor_is_created_at_and_id_of_last_row():
+    rows, cursor = make_db().list_interviews(limit=2)
+
+    assert [row[0] for row in rows] == [7, 6]
+    assert cursor == (rows[-1][2], 6)
+
+
+def test_last_page_has_no_cursor():
+    rows, cursor = make_db().list_interviews(limit=7)
+
+    assert len(rows) == 7
+    assert cursor is None
+
+
+def test_search_is_escaped_and_combined_with_the_cursor():
+    db = make_db()
+    db.list_interviews(limit=5, cursor=(START, 9), search="50%_off")
+
+    query, params = db.pool.executed[-1]
+    assert "audio_filename ILIKE %s AND (created_at, id) < (%s, %s)" in query
+    assert params == ("%50\\%\\_off%", START, 9, 6)
+
+
+def test_escape_like():
+    assert _escape_like("a\\b%c_d") == "a\\\\b\\%c\\_d"
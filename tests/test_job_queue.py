@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from services import job_queue
+from services.job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(fake_redis, monkeypatch):
+    monkeypatch.setenv("JOB_STALE_AFTER", "60")
+    monkeypatch.setenv("JOB_MAX_ATTEMPTS", "2")
+    fake_redis(job_queue)
+    return JobQueue()
+
+
+def test_dequeue_claims_with_heartbeat(queue):
+    queue.enqueue("a", {"file_name": "a.mp3"})
+
+    assert queue.dequeue(timeout=0.1) == ("a", {"file_name": "a.mp3"})
+    assert queue.r.lrange(queue.processing_key, 0, -1) == ["a"]
+    assert queue.r.hget("job:a", "heartbeat") is not None
+    assert queue.r.hget("job:a", "attempts") == "1"
+    # Just claimed, so not stale
+    assert queue.requeue_stale() == 0
+
+
+def test_dequeue_times_out_on_empty_queue(queue):
+    assert queue.dequeue(timeout=0.1) is None
+
+
+def test_dequeue_drops_expired_jobs(queue):
+    queue.enqueue("gone", {})
+    queue.r.delete("job:gone")
+    queue.enqueue("b", {})
+
+    assert queue.dequeue(timeout=0.1) == ("b", {})
+    assert queue.r.lrange(queue.processing_key, 0, -1) == ["b"]
+
+
+def test_requeue_stale_puts_back_silent_jobs(queue):
+    queue.enqueue("a", {})
+    queue.dequeue(timeout=0.1)
+    queue.update("a", "transcribing", 10, interview_id=7)
+    queue.r.hset("job:a", "heartbeat", time.time() - 120)
+
+    assert queue.requeue_stale() == 1
+    assert queue.r.lrange(queue.pending_key, 0, -1) == ["a"]
+    assert queue.r.llen(queue.processing_key) == 0
+    assert queue.get("a")["status"] == "queued"
+    # Kept so the retry resumes the saved interview instead of creating another one
+    assert queue.get("a")["interview_id"] == 7
+
+
+def test_requeue_stale_keeps_live_jobs(queue):
+    queue.enqueue("a", {})
+    queue.dequeue(timeout=0.1)
+    queue.heartbeat("a")
+
+    assert queue.requeue_stale() == 0
+    assert queue.r.lrange(queue.processing_key, 0, -1) == ["a"]
+
+
+def test_job_that_keeps_killing_workers_is_dead_lettered(queue):
+    queue.enqueue("poison", {})
+    for _ in range(2):
+        assert queue.dequeue(timeout=0.1)[0] == "poison"
+        queue.r.hset("job:poison", "heartbeat", time.time() - 120)
+        queue.requeue_stale()
+
+    assert queue.r.llen(queue.pending_key) == 0
+    assert queue.r.lrange(queue.dead_key, 0, -1) == ["poison"]
+    assert queue.get("poison")["status"] == "failed"
+
+
+def test_dead_lettered_job_deletes_its_upload(queue, tmp_path):
+    spilled = tmp_path / "poison.mp3"
+    spilled.write_bytes(b"audio")
+    queue.enqueue("poison", {"file_path": str(spilled)})
+    queue.store_audio("poison", b"audio")
+    for _ in range(2):
+        queue.dequeue(timeout=0.1)
+        queue.r.hset("job:poison", "heartbeat", time.time() - 120)
+        queue.requeue_stale()
+
+    assert not spilled.exists()
+    assert not queue.r.exists("job:poison:audio")
@@ -0,0 +1,103 @@
+import pytest
+
+from services import metrics
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.traces = []
+        self.evictions = 0
+
+    def save_metrics(self, trace_id, operation, interview_id, spans):
+        self.traces.append((operation, [span[0] for span in spans]))
+
+    def evict_metrics(self, max_age_days):
+        self.evictions += 1
+
+
+@pytest.fixture(autouse=True)
+def redis(fake_redis):
+    return fake_redis(metrics)
+
+
+def test_a_streaming_trace_does_not_leak_into_the_caller():
+    db = FakeDatabase()
+
+    @metrics.traced_generator
+    def stream():
+        with metrics.trace("stream", db):
+            for item in ("a", "b"):
+                with metrics.span("item"):
+                    yield item
+
+    for _ in stream():
+        assert metrics.current_trace() is None
+    assert db.traces == [("stream", ["item", "item", "stream"])]
+
+
+def test_an_abandoned_stream_still_saves_its_trace():
+    db = FakeDatabase()
+
+    @metrics.traced_generator
+    def stream():
+        with metrics.trace("stream", db):
+            yield "a"
+            yield "b"
+
+    items = stream()
+    next(items)
+    items.close()
+    assert metrics.current_trace() is None
+    assert db.traces == [("stream", ["stream"])]
+
+
+def test_a_streaming_trace_nests_in_the_callers_trace():
+    db = FakeDatabase()
+
+    @metrics.traced_generator
+    def stream():
+        with metrics.trace("stream", db):
+            yield "a"
+
+    with metrics.trace("request", db):
+        list(stream())
+    assert db.traces == [("request", ["stream", "request"])]
+
+
+def test_trace_end_does_not_evict_metrics():
+    db = FakeDatabase()
+    with metrics.trace("request", db):
+        pass
+    assert db.evictions == 0
+
+
+def test_old_metrics_are_evicted_once_per_interval():
+    db = FakeDatabase()
+    assert metrics.evict_old_metrics(db)
+    assert not metrics.evict_old_metrics(db)
+    assert db.evictions == 1
+
+
+def test_http_counts_are_flushed_when_a_trace_ends(redis):
+    metrics.count_http("requests")
+    metrics.count_http("requests")
+    metrics.count_http("connections")
+    assert redis.hgetall(metrics.HTTP_KEY) == {}
+
+    with metrics.trace("request", FakeDatabase()):
+        pass
+    assert redis.hgetall(metrics.HTTP_KEY) == {"requests": "2", "connections": "1"}
+
+
+def test_http_counts_include_unflushed_ones():
+    metrics.count_http("requests")
+    assert metrics.get_http_counts() == (1, 0)
+
+
+def test_prometheus_exposes_cache_lookups(redis):
+    redis.hset("transcription_cache:stats", mapping={"redis_hits": 2, "misses": 1})
+    redis.hset("analysis_cache:stats", mapping={"memory_hits": 3})
+    text = metrics.render_prometheus()
+    assert 'jobby_cache_lookups_total{cache="transcription",result="redis_hits"} 2' in text
+    assert 'jobby_cache_lookups_total{cache="transcription",result="misses"} 1' in text
+    assert 'jobby_cache_lookups_total{cache="analysis",result="memory_hits"} 3' in text
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+import redis
+
+from services import rate_limiter
+from services.rate_limiter import RateGovernor, RateLimitExceeded, parse_reset_duration, retry_delay_from_headers
+
+
+@pytest.fixture
+def governor(fake_redis, monkeypatch):
+    fake_redis(rate_limiter)
+    monkeypatch.setenv("RATE_LIMIT_CHAT_RPM", "10")
+    monkeypatch.setenv("RATE_LIMIT_CHAT_TPM", "1000")
+    return RateGovernor()
+
+
+def test_requests_are_granted_until_the_bucket_is_empty(governor):
+    for _ in range(10):
+        assert governor._try_acquire("chat", 0, "interactive") == 0
+    # One request refills every 6 seconds at 10 rpm
+    assert 0 < governor._try_acquire("chat", 0, "interactive") <= 6
+
+
+def test_bulk_work_leaves_the_reserve_to_interactive_requests(governor):
+    # 20% of 10 rpm is held back: bulk stops with 2 requests left in the bucket
+    for _ in range(8):
+        assert governor._try_acquire("chat", 0, "bulk") == 0
+    assert governor._try_acquire("chat", 0, "bulk") > 0
+    assert governor._try_acquire("chat", 0, "interactive") == 0
+    assert governor._try_acquire("chat", 0, "interactive") == 0
+    assert governor._try_acquire("chat", 0, "interactive") > 0
+
+
+def test_token_cost_is_taken_from_the_token_bucket(governor):
+    assert governor._try_acquire("chat", 600, "interactive") == 0
+    wait = governor._try_acquire("chat", 600, "interactive")
+    # 200 missing tokens at 1000 tpm
+    assert wait == pytest.approx(12, abs=0.5)
+    assert governor._try_acquire("chat", 400, "interactive") == 0
+
+
+def test_a_cooldown_pauses_every_caller(governor):
+    governor._cool_down("chat", 3)
+    assert 2 < governor._try_acquire("chat", 0, "interactive") <= 3
+    assert governor._try_acquire("whisper", 0, "interactive") == 0
+
+
+def test_acquire_gives_up_when_the_wait_exceeds_the_queue_limit(governor):
+    governor.max_queue_wait = 1
+    governor._cool_down("chat", 30)
+    with pytest.raises(RateLimitExceeded):
+        governor.acquire("chat")
+
+
+def test_requests_go_through_when_redis_is_down(governor, monkeypatch):
+    def unavailable(**kwargs):
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(governor, "acquire_script", unavailable)
+    assert governor._try_acquire("chat", 0, "interactive") == 0
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("20ms", 0.02),
+    ("1.5s", 1.5),
+    ("6m0s", 360),
+    ("1h2m", 3720),
+    ("7", 7),
+    ("", None),
+    ("soon", None),
+])
+def test_parse_reset_duration(value, seconds):
+    assert parse_reset_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
+
+
+def test_retry_delay_prefers_milliseconds_header():
+    error = SimpleNamespace(response=SimpleNamespace(headers={"retry-after-ms": "250", "retry-after": "5"}))
+    assert retry_delay_from_headers(error) == 0.25
+
+
+def test_retry_delay_takes_the_longest_reset():
+    error = SimpleNamespace(response=SimpleNamespace(headers={
+        "x-ratelimit-reset-requests": "2s",
+        "x-ratelimit-reset-tokens": "1m",
+    }))
+    assert retry_delay_from_headers(error) == 60
+    assert retry_delay_from_headers(SimpleNamespace(response=None)) is None